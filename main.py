@@ -1,23 +1,35 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import uvicorn
 
 from config import get_settings
-from services.nlu_service import NLUService
+from services.nlu_service import NLUService, to_mutable
 from services.image_generation_service import ImageGenerationService
 from services.product_search_service import ProductSearchService
 from services.suggestion_service import SuggestionService
 from services.look_generation_service import LookGenerationService
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the suggestion model in the background while the server starts taking requests."""
+    warmup_task = asyncio.create_task(suggestion_service.warmup())
+    yield
+    warmup_task.cancel()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Athena Fashion Search API",
     description="AI-powered fashion search with visual concept generation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson encodes large product lists much faster than stdlib json
 )
 
 # CORS middleware for local development
@@ -184,7 +196,7 @@ async def search(request: SearchRequest):
 
         return SearchResponse(
             images=concept_images,
-            parsed_attributes=parsed_attributes
+            parsed_attributes=to_mutable(parsed_attributes)
         )
 
     except Exception as e:
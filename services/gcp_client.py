@@ -1,6 +1,7 @@
 import os
 from typing import Optional
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
 from google.oauth2 import service_account
 import vertexai
 from vertexai.generative_models import GenerativeModel, Part, Image
@@ -13,6 +14,7 @@ class GCPClient:
     def __init__(self):
         self.settings = get_settings()
         self._bigquery_client: Optional[bigquery.Client] = None
+        self._bigquery_storage_client: Optional[bigquery_storage.BigQueryReadClient] = None
         self._credentials = None
         self._initialize_credentials()
         self._initialize_vertex_ai()
@@ -53,6 +55,15 @@ class GCPClient:
             )
         return self._bigquery_client
 
+    @property
+    def bigquery_storage(self) -> bigquery_storage.BigQueryReadClient:
+        """Get or create BigQuery Storage Read API client (used for bulk result downloads)."""
+        if self._bigquery_storage_client is None:
+            self._bigquery_storage_client = bigquery_storage.BigQueryReadClient(
+                credentials=self._credentials
+            )
+        return self._bigquery_storage_client
+
     def get_gemini_model(self, model_name: Optional[str] = None) -> GenerativeModel:
         """Get a Gemini model instance."""
         model_name = model_name or self.settings.gemini_model
@@ -1,23 +1,60 @@
-from typing import Dict, Any, List, Optional
+import json
+import re
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 from services.gcp_client import get_gcp_client
 
+# Matches a leading ```/```json fence and a trailing ``` fence in Gemini responses
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE | re.DOTALL)
+
+# Maximum number of parsed queries kept in the NLU cache
+_PARSE_CACHE_SIZE = 128
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def to_mutable(value: Any) -> Any:
+    """Return a mutable deep copy of a frozen structure returned by NLUService."""
+    if isinstance(value, Mapping):
+        return {k: to_mutable(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [to_mutable(v) for v in value]
+    return value
+
 
 class NLUService:
     """Natural Language Understanding service using Gemini for query parsing."""
 
     def __init__(self):
         self.gcp_client = get_gcp_client()
+        self._parse_cache: "OrderedDict[str, Mapping[str, Any]]" = OrderedDict()
 
-    async def parse_fashion_query(self, query: str) -> Dict[str, Any]:
+    async def parse_fashion_query(self, query: str) -> Mapping[str, Any]:
         """
         Parse a natural language fashion query into structured attributes.
 
+        Successful parses are cached per query. The returned mapping is read-only
+        (nested dicts are read-only mappings, lists are tuples) so cached results
+        can be shared without copying; use to_mutable() if you need to edit it.
+
         Args:
             query: Natural language fashion search query
 
         Returns:
-            Dictionary containing extracted attributes and visual generation prompt
+            Mapping containing extracted attributes and visual generation prompt
         """
+        cached = self._parse_cache.get(query)
+        if cached is not None:
+            self._parse_cache.move_to_end(query)
+            return cached
 
         parsing_prompt = f"""You are an expert fashion stylist and AI assistant specializing in WOMEN'S FASHION. Analyze the following fashion search query and extract structured information.
 
@@ -88,22 +125,20 @@ Ensure the visual_generation_prompt is highly detailed and describes a specific,
             response_text = response.text.strip()
 
             # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-
-            import json
-            parsed_data = json.loads(response_text.strip())
+            response_text = _FENCE_RE.sub("", response_text)
+
+            parsed_data = _freeze(json.loads(response_text.strip()))
+
+            self._parse_cache[query] = parsed_data
+            if len(self._parse_cache) > _PARSE_CACHE_SIZE:
+                self._parse_cache.popitem(last=False)
 
             return parsed_data
 
         except Exception as e:
             print(f"Error parsing query with Gemini: {e}")
-            # Fallback to basic parsing
-            return self._basic_fallback_parsing(query)
+            # Fallback to basic parsing (not cached, so a later call can retry Gemini)
+            return _freeze(self._basic_fallback_parsing(query))
 
     def _basic_fallback_parsing(self, query: str) -> Dict[str, Any]:
         """Fallback parsing if Gemini fails."""
@@ -159,7 +194,7 @@ CRITICAL: This application is EXCLUSIVELY for women's fashion. All concepts MUST
 Original Query: "{original_query}"
 
 Parsed Attributes:
-{parsed_attributes}
+{to_mutable(parsed_attributes)}
 
 Generate 3 different interpretations of this request, each taking a different creative direction while staying true to the core request:
 
@@ -209,14 +244,8 @@ Each visual_prompt should be detailed and ready to use for image generation."""
             response_text = response.text.strip()
 
             # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-
-            import json
+            response_text = _FENCE_RE.sub("", response_text)
+
             parsed_data = json.loads(response_text.strip())
             variations = parsed_data.get("variations", [])
 
@@ -358,14 +387,8 @@ Return only the JSON, no additional text."""
             print(f"Response text preview: {response_text[:200]}...")
 
             # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-
-            import json
+            response_text = _FENCE_RE.sub("", response_text)
+
             parsed_data = json.loads(response_text.strip())
             garments = parsed_data.get("garments", [])
 
@@ -498,14 +521,8 @@ Return your analysis in this JSON format:
             print(f"[DEBUG] Response text preview: {response_text[:200]}...")
 
             # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-
-            import json
+            response_text = _FENCE_RE.sub("", response_text)
+
             parsed_data = json.loads(response_text.strip())
             print(f"[DEBUG] Successfully parsed JSON response")
             print(f"[DEBUG] Parsed data keys: {list(parsed_data.keys())}")
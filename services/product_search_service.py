@@ -1,8 +1,151 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from google.api_core.exceptions import Forbidden, PermissionDenied
+from google.cloud import bigquery
 from services.gcp_client import get_gcp_client
 from config import get_settings
 import re
 
+logger = logging.getLogger(__name__)
+
+# Embedding cache: in-memory LRU backed by .npy files, keyed by a content hash
+_EMBEDDING_CACHE_DIR = ".embedding_cache"
+_EMBEDDING_CACHE_SIZE = 256
+_embedding_cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+
+# Product fields copied as-is from vector search result columns (field, column)
+_PRODUCT_COLUMNS = (
+    ("id", "product_id"),
+    ("name", "product_name"),
+    ("description", "description"),
+    ("color", "base_color"),
+    ("secondary_color", "secondary_color"),
+    ("category", "category"),
+    ("subcategory", "subcategory"),
+    ("brand", "brand_name"),
+    ("pattern", "pattern"),
+    ("fabric", "fabric"),
+    ("fit", "fit"),
+    ("sleeve_length", "sleeve_length"),
+    ("neck_style", "neck_style"),
+    ("season", "season"),
+    ("occasion", "occasion"),
+    ("style", "style"),
+)
+_PRODUCT_KEYS = tuple(field for field, _ in _PRODUCT_COLUMNS)
+
+# Multimodal embedding model, loaded on first use and shared by all service instances
+_MM_MODEL_NAME = "multimodalembedding@001"
+_MM_MODEL = None
+
+# GCS URI prefix and the public HTTPS base it maps to
+_GCS_PREFIX = "gs://"
+_GCS_PUBLIC_BASE = "https://storage.googleapis.com/"
+
+
+def _get_cached_embedding(key: str) -> Optional[List[float]]:
+    """Look up an embedding in the memory cache, then on disk."""
+    cached = _embedding_cache.get(key)
+    if cached is not None:
+        _embedding_cache.move_to_end(key)
+        return list(cached)
+
+    path = os.path.join(_EMBEDDING_CACHE_DIR, f"{key}.npy")
+    try:
+        cached = tuple(np.load(path).tolist())
+    except (OSError, ValueError):
+        return None
+
+    _remember_embedding(key, cached)
+    return list(cached)
+
+
+def _remember_embedding(key: str, embedding: Tuple[float, ...]):
+    """Add an embedding to the in-memory LRU."""
+    _embedding_cache[key] = embedding
+    if len(_embedding_cache) > _EMBEDDING_CACHE_SIZE:
+        _embedding_cache.popitem(last=False)
+
+
+def _store_embedding(key: str, embedding: List[float]):
+    """Store an embedding in the memory cache and persist it to disk as float32."""
+    _remember_embedding(key, tuple(embedding))
+    try:
+        os.makedirs(_EMBEDDING_CACHE_DIR, exist_ok=True)
+        np.save(os.path.join(_EMBEDDING_CACHE_DIR, f"{key}.npy"), np.asarray(embedding, dtype=np.float32))
+    except OSError as e:
+        logger.warning("Could not persist embedding cache entry: %s", e)
+
+
+def _get_mm_model():
+    """Get or load the shared multimodal embedding model."""
+    global _MM_MODEL
+    # Concurrent first calls may both load; the last assignment wins, which is harmless
+    if _MM_MODEL is None:
+        from vertexai.vision_models import MultiModalEmbeddingModel
+        _MM_MODEL = MultiModalEmbeddingModel.from_pretrained(_MM_MODEL_NAME)
+    return _MM_MODEL
+
+
+def _magnitude(embedding: List[float]) -> float:
+    """L2 norm of an embedding vector."""
+    return float(np.linalg.norm(np.asarray(embedding, dtype=np.float32)))
+
+
+def _gcs_to_https_column(gcs_uris: pa.Array) -> pa.Array:
+    """
+    Convert GCS URIs (gs://bucket/path) in an Arrow string column to public HTTPS URLs.
+
+    Values that are not GCS URIs, including nulls, are returned unchanged.
+    """
+    is_gcs = pc.fill_null(pc.starts_with(gcs_uris, _GCS_PREFIX), False)
+    converted = pc.binary_join_element_wise(
+        _GCS_PUBLIC_BASE,
+        pc.utf8_slice_codeunits(gcs_uris, len(_GCS_PREFIX)),
+        ""
+    )
+    return pc.if_else(is_gcs, converted, gcs_uris)
+
+
+def _price_and_similarity(
+    distance: np.ndarray,
+    price_original: np.ndarray,
+    price_discounted: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Numeric core of result formatting, computed over whole columns.
+
+    Args:
+        distance: Cosine distances (NaN for nulls)
+        price_original: Original prices (NaN for nulls)
+        price_discounted: Discounted prices (NaN for nulls)
+
+    Returns:
+        Tuple of (price, price_original, has_discount, similarity_score) arrays
+    """
+    # Convert cosine distance to similarity (0-1 range, where 1 is perfect match)
+    similarity = np.maximum(0.0, 1.0 - np.nan_to_num(distance, nan=1.0))
+
+    # Use discounted price if available, otherwise original
+    price_original = np.nan_to_num(price_original, nan=0.0)
+    price_discounted = np.nan_to_num(price_discounted, nan=0.0)
+    has_discount = price_discounted != 0
+    price = np.where(has_discount, price_discounted, price_original)
+
+    return price, price_original, has_discount, similarity
+
+
+def _embedding_parameter(embedding: List[float]) -> bigquery.ArrayQueryParameter:
+    """Query parameter carrying the query embedding as ARRAY<FLOAT64>."""
+    return bigquery.ArrayQueryParameter("query_embedding", "FLOAT64", embedding)
+
 
 class ProductSearchService:
     """Service for searching products using BigQuery vector search."""
@@ -11,22 +154,18 @@ class ProductSearchService:
         self.gcp_client = get_gcp_client()
         self.settings = get_settings()
 
-    def _convert_gcs_uri_to_url(self, gcs_uri: str) -> str:
-        """
-        Convert GCS URI (gs://bucket/path) to public HTTPS URL.
-
-        Args:
-            gcs_uri: GCS URI like gs://bucket-name/path/to/file.jpg
+        # Bind per-query settings and the BigQuery client once
+        self._dataset = self.settings.bigquery_dataset
+        self._table = self.settings.bigquery_table
+        self._use_vector_index = self.settings.use_vector_index
+        self._bq = self.gcp_client.bigquery
 
-        Returns:
-            Public HTTPS URL like https://storage.googleapis.com/bucket-name/path/to/file.jpg
-        """
-        if not gcs_uri or not gcs_uri.startswith('gs://'):
-            return gcs_uri
-
-        # Convert gs://bucket/path to https://storage.googleapis.com/bucket/path
-        gcs_uri_without_prefix = gcs_uri.replace('gs://', '')
-        return f"https://storage.googleapis.com/{gcs_uri_without_prefix}"
+        # Shared Storage Read API client for fetching results; None falls back to the REST row iterator
+        try:
+            self._bqstorage_client = self.gcp_client.bigquery_storage
+        except Exception as e:
+            logger.warning("BigQuery Storage client unavailable, using REST API for results: %s", e)
+            self._bqstorage_client = None
 
     async def search_products_by_text(
         self,
@@ -51,51 +190,30 @@ class ProductSearchService:
             query_embedding = await self._generate_text_embedding(query)
 
             # Build SQL query for BigQuery vector search
-            sql_query = self._build_vector_search_query(
+            sql_query, query_parameters = self._build_vector_search_query(
                 query_embedding,
                 parsed_attributes,
                 limit
             )
 
             # Execute query
-            query_job = self.gcp_client.bigquery.query(sql_query)
-            results = query_job.result()
+            batches = await self._run_query(sql_query, query_parameters)
 
-            # Format results
-            products = []
-            for row in results:
-                # Extract metadata from JSON column
-                metadata = row.get("metadata", {})
-                if isinstance(metadata, str):
-                    import json
-                    metadata = json.loads(metadata)
-
-                product = {
-                    "id": row.get("product_id"),
-                    "name": metadata.get("productDisplayName", "Unknown Product"),
-                    "description": metadata.get("productDescriptors", {}).get("description", {}).get("value", ""),
-                    "price": metadata.get("price", {}).get("mrp", 0),
-                    "image_url": row.get("gcs_uri", ""),
-                    "color": metadata.get("baseColour", ""),
-                    "category": metadata.get("articleType", {}).get("typeName", ""),
-                    "brand": metadata.get("brandName", ""),
-                    "season": metadata.get("season", ""),
-                    "gender": metadata.get("gender", ""),
-                    "similarity_score": float(row.get("similarity_score", 0))
-                }
-                products.append(product)
+            # Format results the same way as image search, so similarity comes from distance
+            products = self._products_from_arrow(batches)
 
             return products
 
         except Exception as e:
-            print(f"Error searching products: {e}")
+            logger.error("Error searching products: %s", e)
             return []
 
     async def search_products_by_image(
         self,
         image_url: str,
         parsed_attributes: Dict[str, Any],
-        limit: int = 20
+        limit: int = 20,
+        precomputed_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search products using the generated concept image and multimodal embedding.
@@ -104,115 +222,65 @@ class ProductSearchService:
             image_url: URL/path to the generated concept image
             parsed_attributes: Parsed attributes from NLU service
             limit: Maximum number of results to return
+            precomputed_embedding: Embedding of image_url if the caller already has it
 
         Returns:
             List of matching products with similarity scores
         """
 
         try:
-            print(f"\n{'='*60}")
-            print(f"PRODUCT SEARCH - Starting search")
-            print(f"{'='*60}")
-            print(f"Image URL: {image_url}")
-            print(f"Parsed Attributes: {parsed_attributes}")
-            print(f"Limit: {limit}")
-
-            # Generate embedding from the actual image
-            print(f"\n[1/4] Generating embedding from concept image...")
-            query_embedding = await self._generate_image_embedding(image_url)
-            print(f"✓ Generated embedding with {len(query_embedding)} dimensions")
-            print(f"  First 5 values: {query_embedding[:5]}")
-            print(f"  Embedding magnitude: {sum(x*x for x in query_embedding)**0.5:.4f}")
+            logger.debug(
+                "Product search: image_url=%s limit=%d parsed_attributes=%s",
+                image_url, limit, parsed_attributes
+            )
+
+            # Generate embedding from the actual image (unless the caller already did)
+            if precomputed_embedding is not None:
+                logger.debug("[1/4] Using precomputed embedding for concept image")
+                query_embedding = precomputed_embedding
+            else:
+                logger.debug("[1/4] Generating embedding from concept image...")
+                query_embedding = await self._generate_image_embedding(image_url)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Generated embedding with %d dimensions (first 5: %s, magnitude: %.4f)",
+                    len(query_embedding), query_embedding[:5], _magnitude(query_embedding)
+                )
 
             # Build SQL query
-            print(f"\n[2/4] Building SQL query...")
-            sql_query = self._build_vector_search_query(
+            sql_query, query_parameters = self._build_vector_search_query(
                 query_embedding,
                 parsed_attributes,
                 limit
             )
-            print(f"✓ SQL Query built")
-            print(f"  Using vector index: {self.settings.use_vector_index}")
-            print(f"\n--- SQL Query ---")
-            print(sql_query)
-            print(f"--- End SQL Query ---\n")
+            logger.debug(
+                "[2/4] SQL query built (vector index: %s):\n%s",
+                self._use_vector_index, sql_query
+            )
 
             # Execute query
-            print(f"[3/4] Executing BigQuery search...")
-            query_job = self.gcp_client.bigquery.query(sql_query)
-            results = query_job.result()
-            print(f"✓ Query executed successfully")
+            logger.debug("[3/4] Executing BigQuery search...")
+            batches = await self._run_query(sql_query, query_parameters)
 
             # Format results
-            print(f"\n[4/4] Processing results...")
-            products = []
-            row_count = 0
-            for row in results:
-                row_count += 1
-
-                # Get GCS URI and convert to public URL
-                gcs_uri = row.get("gcs_uri", "")
-                image_url = self._convert_gcs_uri_to_url(gcs_uri)
-
-                # Get price (use discounted if available, otherwise original)
-                price_discounted = row.get("price_discounted")
-                price_original = row.get("price_original", 0)
-                price = price_discounted if price_discounted else price_original
-
-                # Calculate similarity score from distance (lower distance = higher similarity)
-                distance = float(row.get("distance", 1.0))
-                # Convert cosine distance to similarity (0-1 range, where 1 is perfect match)
-                similarity_score = max(0.0, 1.0 - distance)
-
-                # Map all fields from the synthetic_products table
-                product = {
-                    "id": row.get("product_id", ""),
-                    "name": row.get("product_name", "Product"),
-                    "description": row.get("description", ""),
-                    "price": float(price) if price else 0.0,
-                    "price_original": float(price_original) if price_original else 0.0,
-                    "price_discounted": float(price_discounted) if price_discounted else None,
-                    "image_url": image_url,
-                    "color": row.get("base_color", ""),
-                    "secondary_color": row.get("secondary_color"),
-                    "category": row.get("category", ""),
-                    "subcategory": row.get("subcategory"),
-                    "brand": row.get("brand_name", ""),
-                    "pattern": row.get("pattern"),
-                    "fabric": row.get("fabric"),
-                    "fit": row.get("fit"),
-                    "sleeve_length": row.get("sleeve_length"),
-                    "neck_style": row.get("neck_style"),
-                    "season": row.get("season", ""),
-                    "occasion": row.get("occasion"),
-                    "style": row.get("style"),
-                    "gender": "Women",
-                    "similarity_score": similarity_score
-                }
-                products.append(product)
-
-                if row_count <= 3:
-                    print(f"\n  Product {row_count}:")
-                    print(f"    ID: {product['id']}")
-                    print(f"    Name: {product['name']}")
-                    print(f"    Price: ${product['price']}")
-                    print(f"    Color: {product['color']}")
-                    print(f"    Fabric: {product['fabric']}")
-                    print(f"    Fit: {product['fit']}")
-                    print(f"    Pattern: {product['pattern']}")
-                    print(f"    GCS URI: {gcs_uri}")
-                    print(f"    Image URL: {image_url}")
-                    print(f"    Distance: {distance:.4f} -> Similarity: {similarity_score:.2%}")
-
-            print(f"\n✓ Found {len(products)} matching products")
-            print(f"{'='*60}\n")
+            logger.debug("[4/4] Processing results...")
+            products = self._products_from_arrow(batches)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, product in enumerate(products[:3], 1):
+                    logger.debug(
+                        "Product %d: id=%s name=%s price=%s color=%s fabric=%s fit=%s "
+                        "pattern=%s image_url=%s similarity=%.2f%%",
+                        i, product['id'], product['name'], product['price'], product['color'],
+                        product['fabric'], product['fit'], product['pattern'],
+                        product['image_url'], product['similarity_score'] * 100
+                    )
+
+            logger.debug("Found %d matching products", len(products))
             return products
 
-        except Exception as e:
-            print(f"\n✗ Error searching products by image: {e}")
-            import traceback
-            traceback.print_exc()
-            print(f"{'='*60}\n")
+        except Exception:
+            logger.exception("Image product search failed")
             return []
 
     async def search_products_multi_category(
@@ -236,27 +304,37 @@ class ProductSearchService:
             - search_mode: "multi_category" or "single"
         """
 
+        query_embedding = None
+
         try:
-            print(f"\n{'='*80}")
-            print(f"MULTI-CATEGORY PRODUCT SEARCH")
-            print(f"{'='*80}")
-            print(f"Image URL: {image_url}")
-            print(f"Limit per category: {limit_per_category}")
+            logger.debug(
+                "Multi-category product search: image_url=%s limit_per_category=%d",
+                image_url, limit_per_category
+            )
+
+            # Step 1: Generate a single image embedding from the concept image first, so both
+            # single-search fallbacks below can reuse it
+            # Use the SAME image embedding for all categories to match product embeddings
+            logger.debug("[1/4] Generating image embedding from concept image...")
+            query_embedding = await self._generate_image_embedding(image_url)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Image embedding generated (magnitude: %.4f)", _magnitude(query_embedding))
 
-            # Step 1: Analyze garment regions using Gemini vision
+            # Step 2: Analyze garment regions using Gemini vision
             from services.nlu_service import NLUService
             nlu_service = NLUService()
 
-            print(f"\n[1/4] Analyzing garment regions...")
+            logger.debug("[2/4] Analyzing garment regions...")
             garments = await nlu_service.analyze_garment_regions(image_url)
 
             if not garments or len(garments) == 0:
-                print(f"[!] No garments detected, falling back to single-embedding search")
+                logger.debug("No garments detected, falling back to single-embedding search")
                 # Fallback to single embedding search
                 products = await self.search_products_by_image(
                     image_url,
                     parsed_attributes,
-                    limit=limit_per_category * 2
+                    limit=limit_per_category * 2,
+                    precomputed_embedding=query_embedding
                 )
                 return {
                     "products_by_category": {},
@@ -264,99 +342,36 @@ class ProductSearchService:
                     "search_mode": "single"
                 }
 
-            print(f"[✓] Detected {len(garments)} garment(s)")
+            logger.debug("Detected %d garment(s)", len(garments))
 
-            # Step 2: Generate a single image embedding from the concept image
-            # Use the SAME image embedding for all categories to match product embeddings
-            print(f"\n[2/4] Generating image embedding from concept image...")
-            print(f"  [!] Using IMAGE embedding (not text) to match product database embedding space")
-            query_embedding = await self._generate_image_embedding(image_url)
-            print(f"  [✓] Image embedding generated (magnitude: {sum(x*x for x in query_embedding)**0.5:.4f})")
-
-            # Create garment data with the shared image embedding
-            garment_embeddings = []
-            for garment in garments:
-                garment_embeddings.append({
-                    "category": garment['category'],
-                    "subcategory": garment['subcategory'],
-                    "description": garment['description'],
-                    "embedding": query_embedding  # Same image embedding for all categories
-                })
-            print(f"  [✓] Using shared image embedding for {len(garment_embeddings)} categories")
-
-            # Step 3: Search products for each category
-            print(f"\n[3/4] Searching products for each category...")
+            # Step 3: Search products for all categories in a single query
+            logger.debug("[3/4] Searching products for %d categories...", len(garments))
+            sql_query, query_parameters = self._build_multi_category_query(
+                query_embedding,
+                garments,
+                limit_per_category
+            )
+            logger.debug("Multi-category SQL query:\n%s", sql_query)
+            batches = await self._run_query(sql_query, query_parameters)
+
+            # Split rows back into categories
             products_by_category = {}
             all_products = []
-
-            for i, garment_data in enumerate(garment_embeddings, 1):
-                category = garment_data['category']
-                embedding = garment_data['embedding']
-
-                print(f"  [{i}/{len(garment_embeddings)}] Searching for {category}...")
-
-                # Build category-specific query
-                sql_query = self._build_category_specific_query(
-                    embedding,
-                    category,
-                    garment_data['subcategory'],
-                    limit_per_category
-                )
-
-                print(f"\n--- SQL Query for {category} ---")
-                print(sql_query)
-                print(f"--- End SQL Query ---\n")
-
-                # Execute query
-                query_job = self.gcp_client.bigquery.query(sql_query)
-                results = query_job.result()
-
-                # Format results
+            results = pa.Table.from_batches(batches) if batches else None
+            for i, garment in enumerate(garments):
+                category = garment['category']
                 category_products = []
-                for row in results:
-                    gcs_uri = row.get("gcs_uri", "")
-                    image_url_converted = self._convert_gcs_uri_to_url(gcs_uri)
-
-                    price_discounted = row.get("price_discounted")
-                    price_original = row.get("price_original", 0)
-                    price = price_discounted if price_discounted else price_original
-
-                    distance = float(row.get("distance", 1.0))
-                    similarity_score = max(0.0, 1.0 - distance)
-
-                    product = {
-                        "id": row.get("product_id", ""),
-                        "name": row.get("product_name", "Product"),
-                        "description": row.get("description", ""),
-                        "price": float(price) if price else 0.0,
-                        "price_original": float(price_original) if price_original else 0.0,
-                        "price_discounted": float(price_discounted) if price_discounted else None,
-                        "image_url": image_url_converted,
-                        "color": row.get("base_color", ""),
-                        "secondary_color": row.get("secondary_color"),
-                        "category": row.get("category", ""),
-                        "subcategory": row.get("subcategory"),
-                        "brand": row.get("brand_name", ""),
-                        "pattern": row.get("pattern"),
-                        "fabric": row.get("fabric"),
-                        "fit": row.get("fit"),
-                        "sleeve_length": row.get("sleeve_length"),
-                        "neck_style": row.get("neck_style"),
-                        "season": row.get("season", ""),
-                        "occasion": row.get("occasion"),
-                        "style": row.get("style"),
-                        "gender": "Women",
-                        "similarity_score": similarity_score,
-                        "matched_category": category  # Add category label
-                    }
-                    category_products.append(product)
-                    all_products.append(product)
-
+                if results is not None:
+                    rows = results.filter(pc.equal(results.column("category_index"), i))
+                    category_products = self._products_from_arrow(
+                        rows.to_batches(),
+                        matched_category=category
+                    )
+                logger.debug("Found %d products for %s", len(category_products), category)
                 products_by_category[category] = category_products
-                print(f"  [✓] Found {len(category_products)} products for {category}")
+                all_products.extend(category_products)
 
-            print(f"\n[4/4] Total products found: {len(all_products)}")
-            print(f"{'='*80}\n")
+            logger.debug("[4/4] Total products found: %d", len(all_products))
 
             return {
                 "products_by_category": products_by_category,
@@ -364,17 +379,16 @@ class ProductSearchService:
                 "search_mode": "multi_category"
             }
 
-        except Exception as e:
-            print(f"\n[✗] Error in multi-category search: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Multi-category search failed")
 
             # Fallback to single-embedding search
-            print(f"[!] Falling back to single-embedding search")
+            logger.debug("Falling back to single-embedding search")
             products = await self.search_products_by_image(
                 image_url,
                 parsed_attributes,
-                limit=limit_per_category * 2
+                limit=limit_per_category * 2,
+                precomputed_embedding=query_embedding
             )
             return {
                 "products_by_category": {},
@@ -382,38 +396,157 @@ class ProductSearchService:
                 "search_mode": "single"
             }
 
-    def _build_category_specific_query(
+    async def _run_query(self, sql_query: str, query_parameters: List[Any]) -> List[pa.RecordBatch]:
+        """
+        Run a BigQuery query in the default executor so it doesn't block the event loop.
+
+        Args:
+            sql_query: SQL query string
+            query_parameters: Query parameters referenced by the query
+
+        Returns:
+            Result rows as Arrow record batches
+        """
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+
+        def run() -> List[pa.RecordBatch]:
+            query_job = self._bq.query(sql_query, job_config=job_config)
+            if self._bqstorage_client is not None:
+                try:
+                    return list(query_job.result().to_arrow_iterable(bqstorage_client=self._bqstorage_client))
+                except (PermissionDenied, Forbidden) as e:
+                    # Storage Read API disabled, or no bigquery.readsessions.create permission;
+                    # stop trying it and read this and later results over REST
+                    logger.warning("BigQuery Storage Read API unavailable, using REST API for results: %s", e)
+                    self._bqstorage_client = None
+            return list(query_job.result().to_arrow_iterable())
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, run)
+
+    def _products_from_arrow(
+        self,
+        batches: Iterable[pa.RecordBatch],
+        matched_category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Convert vector search result batches into product dictionaries.
+
+        Price and similarity are computed per column with NumPy; only the final
+        zip into dictionaries is done row by row.
+
+        Args:
+            batches: Arrow record batches from a VECTOR_SEARCH query
+            matched_category: Category label to attach to each product, if any
+
+        Returns:
+            List of product dictionaries
+        """
+        products = []
+
+        for batch in batches:
+            num_rows = batch.num_rows
+            if num_rows == 0:
+                continue
+
+            names = set(batch.schema.names)
+
+            def column(name: str, type_: pa.DataType = pa.string()) -> pa.Array:
+                return batch.column(name) if name in names else pa.nulls(num_rows, type_)
+
+            def float_column(name: str) -> np.ndarray:
+                # Nulls become NaN
+                return column(name, pa.float64()).to_numpy(zero_copy_only=False).astype(np.float64)
+
+            price, price_original, has_discount, similarity = _price_and_similarity(
+                float_column("distance"),
+                float_column("price_original"),
+                float_column("price_discounted")
+            )
+            discounted = [
+                value if flag else None
+                for value, flag in zip(price.tolist(), has_discount.tolist())
+            ]
+
+            image_urls = _gcs_to_https_column(column("gcs_uri")).to_pylist()
+            values = zip(*[column(name).to_pylist() for _, name in _PRODUCT_COLUMNS])
+
+            for row, image_url, price_value, original, discount, score in zip(
+                values, image_urls, price.tolist(), price_original.tolist(), discounted, similarity.tolist()
+            ):
+                product = dict(zip(_PRODUCT_KEYS, row))
+                product["price"] = price_value
+                product["price_original"] = original
+                product["price_discounted"] = discount
+                product["image_url"] = image_url
+                product["gender"] = "Women"
+                product["similarity_score"] = score
+                if matched_category is not None:
+                    product["matched_category"] = matched_category  # Add category label
+                products.append(product)
+
+        return products
+
+    def _build_multi_category_query(
         self,
         query_embedding: List[float],
-        category: str,
-        subcategory: str,
+        garments: List[Dict[str, str]],
         limit: int
-    ) -> str:
+    ) -> Tuple[str, List[Any]]:
         """
-        Build BigQuery query for category-specific search.
+        Build a single BigQuery query that searches every garment category at once.
+
+        Each category gets its own VECTOR_SEARCH arm, tagged with a category_index
+        column (the garment's position in garments); the arms are combined with
+        UNION ALL and share the embedding and top_k parameters.
 
         Args:
-            query_embedding: Embedding vector for the garment
-            category: Main category (Tops, Bottoms, etc.)
-            subcategory: Specific garment type
-            limit: Max results
+            query_embedding: Embedding vector shared by all categories
+            garments: Garment info with category and subcategory
+            limit: Max results per category
 
         Returns:
-            SQL query string
+            Tuple of (SQL query string, query parameters)
         """
-        dataset = self.settings.bigquery_dataset
-        table = self.settings.bigquery_table
+        query_parameters = [
+            _embedding_parameter(query_embedding),
+            bigquery.ScalarQueryParameter("top_k", "INT64", limit),
+        ]
+        arms = []
+        for i, garment in enumerate(garments):
+            category_param = f"category_{i}"
+            query_parameters.append(
+                bigquery.ScalarQueryParameter(category_param, "STRING", garment['category'])
+            )
+            arms.append(
+                f"({self._category_vector_search_sql(category_param, f'{i} AS category_index,')})"
+            )
+
+        query = "\nUNION ALL\n".join(arms) + "\nORDER BY category_index, distance"
+        return query, query_parameters
+
+    def _category_vector_search_sql(self, category_param: str, extra_columns: str = "") -> str:
+        """
+        SQL for a VECTOR_SEARCH restricted to the category in @<category_param>.
+
+        Args:
+            category_param: Name of the STRING query parameter holding the category
+            extra_columns: Additional select-list entries, each followed by a comma
 
-        # Convert embedding to string for SQL
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+        Returns:
+            SQL query string
+        """
+        dataset = self._dataset
+        table = self._table
 
         # Build category filter in the subquery BEFORE vector search
-        category_filter = f"LOWER(category) = '{category.lower()}'"
+        category_filter = f"LOWER(category) = LOWER(@{category_param})"
 
         # Filter the table first, then do vector search on filtered results
         # VECTOR_SEARCH creates an implicit 'base' table reference
-        query = f"""
+        return f"""
         SELECT
+            {extra_columns}
             base.product_id,
             base.product_name,
             base.brand_name,
@@ -437,14 +570,12 @@ class ProductSearchService:
         FROM VECTOR_SEARCH(
             (SELECT * FROM `{dataset}.{table}` WHERE {category_filter}),
             'embedding',
-            (SELECT {embedding_str} AS embedding),
-            top_k => {limit},
+            (SELECT @query_embedding AS embedding),
+            top_k => @top_k,
             distance_type => 'COSINE'
         )
         """
 
-        return query
-
     async def _generate_text_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for text using Google's multimodal embedding model.
@@ -457,22 +588,26 @@ class ProductSearchService:
         """
 
         try:
-            from vertexai.vision_models import MultiModalEmbeddingModel
-
-            model = MultiModalEmbeddingModel.from_pretrained("multimodalembedding@001")
-            embeddings = model.get_embeddings(
-                contextual_text=text,
-                dimension=1408
+            cache_key = "text-" + hashlib.sha256(text.encode()).hexdigest()
+            cached = _get_cached_embedding(cache_key)
+            if cached is not None:
+                return cached
+
+            loop = asyncio.get_running_loop()
+            embeddings = await loop.run_in_executor(
+                None,
+                lambda: _get_mm_model().get_embeddings(contextual_text=text, dimension=1408)
             )
 
             if embeddings and embeddings.text_embedding:
+                _store_embedding(cache_key, embeddings.text_embedding)
                 return embeddings.text_embedding
 
             # Fallback: return zero vector if embedding fails
             return [0.0] * 1408
 
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.error("Error generating embedding: %s", e)
             # Return zero vector as fallback (1408 dimensions)
             return [0.0] * 1408
 
@@ -491,10 +626,7 @@ class ProductSearchService:
         """
 
         try:
-            from vertexai.vision_models import MultiModalEmbeddingModel, Image
-            import os
-
-            print(f"  [Embedding] Processing image URL: {image_url}")
+            from vertexai.vision_models import Image
 
             # Convert URL path to local file path
             if image_url.startswith('/images/'):
@@ -503,59 +635,61 @@ class ProductSearchService:
             else:
                 filepath = image_url
 
-            print(f"  [Embedding] Resolved file path: {filepath}")
-            print(f"  [Embedding] File exists: {os.path.exists(filepath)}")
+            logger.debug("[Embedding] Resolved %s to file path %s", image_url, filepath)
 
             if not os.path.exists(filepath):
-                error_msg = f"Image file not found at {filepath}. Cannot generate embedding."
-                print(f"  [Embedding] ERROR: {error_msg}")
-                raise ValueError(error_msg)
+                raise ValueError(f"Image file not found at {filepath}. Cannot generate embedding.")
+
+            # Load image bytes once; they key the embedding cache and feed the model
+            with open(filepath, "rb") as f:
+                image_bytes = f.read()
 
-            # Load image
-            print(f"  [Embedding] Loading image from file...")
-            image = Image.load_from_file(filepath)
-            print(f"  [Embedding] Image loaded successfully")
+            cache_key = "image-" + hashlib.sha256(image_bytes).hexdigest()
+            cached = _get_cached_embedding(cache_key)
+            if cached is not None:
+                logger.debug("[Embedding] Using cached embedding")
+                return cached
+
+            image = Image(image_bytes=image_bytes)
 
             # Generate embedding using the image
-            print(f"  [Embedding] Generating multimodal embedding...")
-            model = MultiModalEmbeddingModel.from_pretrained("multimodalembedding@001")
-            embeddings = model.get_embeddings(
-                image=image,
-                dimension=1408
+            logger.debug("[Embedding] Generating multimodal embedding...")
+            loop = asyncio.get_running_loop()
+            embeddings = await loop.run_in_executor(
+                None,
+                lambda: _get_mm_model().get_embeddings(image=image, dimension=1408)
             )
 
             if embeddings and embeddings.image_embedding:
-                embedding_magnitude = sum(x*x for x in embeddings.image_embedding)**0.5
-                print(f"  [Embedding] ✓ Embedding generated successfully")
-                print(f"  [Embedding] Magnitude: {embedding_magnitude:.4f}")
+                embedding_magnitude = _magnitude(embeddings.image_embedding)
+                logger.debug("[Embedding] Embedding generated (magnitude: %.4f)", embedding_magnitude)
 
                 # Verify it's not a zero vector
                 if embedding_magnitude < 0.0001:
                     raise ValueError("Generated embedding is a zero vector")
 
+                _store_embedding(cache_key, embeddings.image_embedding)
                 return embeddings.image_embedding
 
             # If no embedding returned, raise error
             raise ValueError("Embedding model returned no image_embedding")
 
         except Exception as e:
-            print(f"  [Embedding] ✗ Error generating image embedding: {e}")
-            import traceback
-            traceback.print_exc()
-            # Re-raise the error instead of returning zero vector
-            raise ValueError(f"Failed to generate image embedding: {str(e)}")
+            # Callers log the traceback; re-raise the error instead of returning zero vector
+            raise ValueError(f"Failed to generate image embedding: {str(e)}") from e
 
     def _build_vector_search_query(
         self,
         query_embedding: List[float],
         parsed_attributes: Dict[str, Any],
         limit: int
-    ) -> str:
+    ) -> Tuple[str, List[Any]]:
         """
         Build BigQuery SQL query for vector similarity search with attribute filtering.
         Works with product_embeddings table schema.
 
         Uses VECTOR_SEARCH if use_vector_index is enabled, otherwise uses manual cosine similarity.
+        The embedding, limit and filter values are passed as query parameters.
 
         Args:
             query_embedding: Query embedding vector (1408-dimensional)
@@ -563,45 +697,49 @@ class ProductSearchService:
             limit: Maximum number of results
 
         Returns:
-            SQL query string
+            Tuple of (SQL query string, query parameters)
         """
 
-        dataset = self.settings.bigquery_dataset
-        table = self.settings.bigquery_table
+        dataset = self._dataset
+        table = self._table
 
-        # Convert embedding to string for SQL
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
+        where_clauses, query_parameters = self._build_where_clauses(parsed_attributes)
+        query_parameters = [
+            _embedding_parameter(query_embedding),
+            bigquery.ScalarQueryParameter("top_k", "INT64", limit),
+            *query_parameters,
+        ]
 
         # Check if vector index should be used
-        use_index = self.settings.use_vector_index
-
-        if use_index:
-            return self._build_vector_index_query(
-                embedding_str,
-                parsed_attributes,
-                limit,
+        if self._use_vector_index:
+            query = self._build_vector_index_query(
+                where_clauses,
                 dataset,
                 table
             )
         else:
-            return self._build_manual_similarity_query(
-                embedding_str,
-                parsed_attributes,
-                limit,
+            query = self._build_manual_similarity_query(
+                where_clauses,
                 dataset,
                 table
             )
 
+        return query, query_parameters
+
     def _build_vector_index_query(
         self,
-        embedding_str: str,
-        parsed_attributes: Dict[str, Any],
-        limit: int,
+        where_clauses: List[str],
         dataset: str,
         table: str
     ) -> str:
         """Build query using VECTOR_SEARCH with index."""
 
+        # Push attribute filters into the base table subquery so the vector
+        # search only considers matching rows
+        where_clause = ""
+        if where_clauses:
+            where_clause = " WHERE " + " AND ".join(where_clauses)
+
         # Correct VECTOR_SEARCH syntax - fetch all needed columns
         query = f"""
         SELECT
@@ -626,10 +764,10 @@ class ProductSearchService:
             base.gcs_uri,
             distance
         FROM VECTOR_SEARCH(
-            (SELECT * FROM `{dataset}.{table}`),
+            (SELECT * FROM `{dataset}.{table}`{where_clause}),
             'embedding',
-            (SELECT {embedding_str} AS embedding),
-            top_k => {limit},
+            (SELECT @query_embedding AS embedding),
+            top_k => @top_k,
             distance_type => 'COSINE'
         )
         """
@@ -638,88 +776,130 @@ class ProductSearchService:
 
     def _build_manual_similarity_query(
         self,
-        embedding_str: str,
-        parsed_attributes: Dict[str, Any],
-        limit: int,
+        where_clauses: List[str],
         dataset: str,
         table: str
     ) -> str:
         """Build query using manual cosine similarity calculation."""
 
-        where_clauses = self._build_where_clauses(parsed_attributes)
         where_clause = ""
         if where_clauses:
             where_clause = "WHERE " + " AND ".join(where_clauses)
 
-        # Build full query with manual cosine similarity
+        # Build full query with manual cosine similarity; distance is returned alongside
+        # similarity_score so results convert the same way as VECTOR_SEARCH output
         query = f"""
         WITH query_embedding AS (
-            SELECT {embedding_str} AS embedding
+            SELECT @query_embedding AS embedding
+        ),
+        scored AS (
+            SELECT
+                p.product_id,
+                p.product_name,
+                p.brand_name,
+                p.category,
+                p.subcategory,
+                p.base_color,
+                p.secondary_color,
+                p.pattern,
+                p.fabric,
+                p.fit,
+                p.sleeve_length,
+                p.neck_style,
+                p.season,
+                p.occasion,
+                p.style,
+                p.gender,
+                p.price_original,
+                p.price_discounted,
+                p.description,
+                p.gcs_uri,
+                -- Calculate cosine similarity
+                (
+                    SELECT SUM(a * b) / (
+                        SQRT(SUM(a * a)) * SQRT(SUM(b * b))
+                    )
+                    FROM UNNEST(p.embedding) AS a WITH OFFSET pos1
+                    JOIN UNNEST(q.embedding) AS b WITH OFFSET pos2
+                    ON pos1 = pos2
+                ) AS similarity_score
+            FROM
+                `{dataset}.{table}` AS p,
+                query_embedding q
+            {where_clause}
         )
         SELECT
-            p.product_id,
-            p.gcs_uri,
-            p.metadata,
-            -- Calculate cosine similarity
-            (
-                SELECT SUM(a * b) / (
-                    SQRT(SUM(a * a)) * SQRT(SUM(b * b))
-                )
-                FROM UNNEST(p.embedding) AS a WITH OFFSET pos1
-                JOIN UNNEST(q.embedding) AS b WITH OFFSET pos2
-                ON pos1 = pos2
-            ) AS similarity_score
-        FROM
-            `{dataset}.{table}` AS p,
-            query_embedding q
-        {where_clause}
+            *,
+            1 - similarity_score AS distance
+        FROM scored
         ORDER BY
             similarity_score DESC
-        LIMIT {limit}
+        LIMIT @top_k
         """
 
         return query
 
-    def _build_where_clauses(self, parsed_attributes: Dict[str, Any]) -> List[str]:
-        """Build WHERE clause conditions from parsed attributes."""
+    def _build_where_clauses(self, parsed_attributes: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+        """
+        Build WHERE clause conditions from parsed attributes.
+
+        Returns:
+            Tuple of (conditions, query parameters referenced by the conditions)
+        """
         where_clauses = []
+        query_parameters = []
 
         explicit_attrs = parsed_attributes.get("explicit_attributes", {})
 
-        # Price filter (from metadata.price.mrp)
+        # Price filter (effective price: discounted if available, otherwise original)
         if explicit_attrs.get("price_max"):
-            where_clauses.append(f"CAST(JSON_VALUE(metadata, '$.price.mrp') AS FLOAT64) <= {explicit_attrs['price_max']}")
+            where_clauses.append("COALESCE(price_discounted, price_original) <= @price_max")
+            query_parameters.append(
+                bigquery.ScalarQueryParameter("price_max", "FLOAT64", float(explicit_attrs["price_max"]))
+            )
         if explicit_attrs.get("price_min"):
-            where_clauses.append(f"CAST(JSON_VALUE(metadata, '$.price.mrp') AS FLOAT64) >= {explicit_attrs['price_min']}")
+            where_clauses.append("COALESCE(price_discounted, price_original) >= @price_min")
+            query_parameters.append(
+                bigquery.ScalarQueryParameter("price_min", "FLOAT64", float(explicit_attrs["price_min"]))
+            )
 
-        # Color filter (from metadata.baseColour)
+        # Color filter
         if explicit_attrs.get("colors"):
-            colors = explicit_attrs["colors"]
-            color_conditions = " OR ".join([
-                f"LOWER(JSON_VALUE(metadata, '$.baseColour')) LIKE '%{c.lower()}%'"
-                for c in colors
-            ])
-            where_clauses.append(f"({color_conditions})")
-
-        # Category/Garment type filter (from metadata.articleType.typeName)
+            where_clauses.append(
+                "EXISTS (SELECT 1 FROM UNNEST(@colors) AS c "
+                "WHERE LOWER(base_color) LIKE CONCAT('%', LOWER(c), '%'))"
+            )
+            query_parameters.append(
+                bigquery.ArrayQueryParameter("colors", "STRING", list(explicit_attrs["colors"]))
+            )
+
+        # Category/Garment type filter (matches either category or subcategory)
         inferred = parsed_attributes.get("inferred_needs", {})
         if inferred.get("garment_types"):
-            garment_types = inferred["garment_types"]
-            type_conditions = " OR ".join([
-                f"LOWER(JSON_VALUE(metadata, '$.articleType.typeName')) LIKE '%{t.lower()}%'"
-                for t in garment_types
-            ])
-            where_clauses.append(f"({type_conditions})")
+            where_clauses.append(
+                "EXISTS (SELECT 1 FROM UNNEST(@garment_types) AS t "
+                "WHERE LOWER(category) LIKE CONCAT('%', LOWER(t), '%') "
+                "OR LOWER(subcategory) LIKE CONCAT('%', LOWER(t), '%'))"
+            )
+            query_parameters.append(
+                bigquery.ArrayQueryParameter("garment_types", "STRING", list(inferred["garment_types"]))
+            )
 
         # Gender filter if specified
         if explicit_attrs.get("gender"):
-            where_clauses.append(f"LOWER(JSON_VALUE(metadata, '$.gender')) = '{explicit_attrs['gender'].lower()}'")
+            where_clauses.append("LOWER(gender) = LOWER(@gender)")
+            query_parameters.append(
+                bigquery.ScalarQueryParameter("gender", "STRING", explicit_attrs["gender"])
+            )
 
         # Season filter if specified
         if explicit_attrs.get("season"):
-            where_clauses.append(f"LOWER(JSON_VALUE(metadata, '$.season')) LIKE '%{explicit_attrs['season'].lower()}%'")
+            where_clauses.append("LOWER(season) LIKE CONCAT('%', LOWER(@season), '%')")
+            query_parameters.append(
+                bigquery.ScalarQueryParameter("season", "STRING", explicit_attrs["season"])
+            )
 
-        return where_clauses
+        return where_clauses, query_parameters
 
     def generate_match_description(
         self,
@@ -1,67 +1,24 @@
+import asyncio
+import logging
+import mmap
 import os
-import json
+import re
+from functools import lru_cache
+import orjson
 from typing import List, Optional
 from services.gcp_client import get_gcp_client
-from vertexai.generative_models import Image, GenerationConfig
+from vertexai.generative_models import GenerativeModel, Image, GenerationConfig
 
+logger = logging.getLogger(__name__)
 
-class SuggestionService:
-    """Service for generating AI-powered style variation suggestions using Gemini with vision."""
+# Matches a leading ```/```json fence and a trailing ``` fence in Gemini responses
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z", re.IGNORECASE | re.DOTALL)
 
-    def __init__(self):
-        self.gcp_client = get_gcp_client()
+# Matches a complete {"title": ..., "description": ...} suggestion object
+_SUGG_RE = re.compile(r'\{\s*"title"\s*:\s*"([^"]+)"\s*,\s*"description"\s*:\s*"([^"]+)"\s*\}', re.DOTALL)
 
-    async def generate_style_suggestions(
-        self,
-        image_url: str,
-        description: str,
-        original_query: str
-    ) -> List[str]:
-        """
-        Analyze a fashion concept image and generate 4-6 style variation suggestions.
-
-        Args:
-            image_url: URL/path to the concept image
-            description: Text description of the current concept
-            original_query: User's original search query
-
-        Returns:
-            List of 4-6 short, actionable refinement suggestions
-        """
-
-        print("\n" + "="*80)
-        print("GENERATING STYLE SUGGESTIONS")
-        print("="*80)
-        print(f"Image URL: {image_url}")
-        print(f"Description: {description[:100]}...")
-        print(f"Original Query: {original_query}")
-
-        try:
-            print("\n[1] Loading concept image...")
-
-            # Load the image from local path
-            if image_url.startswith("/images/"):
-                filename = image_url.replace("/images/", "")
-                filepath = os.path.join("generated_images", filename)
-
-                if not os.path.exists(filepath):
-                    print(f"[✗] Image file not found at {filepath}")
-                    return self._fallback_suggestions()
-
-                print(f"[✓] Image found: {filepath}")
-
-                # Load image for Gemini vision
-                image = Image.load_from_file(filepath)
-            else:
-                print(f"[✗] Unsupported image URL format: {image_url}")
-                return self._fallback_suggestions()
-
-            print("\n[2] Initializing Gemini model with vision...")
-            model = self.gcp_client.get_gemini_model()  # Gemini 2.5 Flash supports vision
-            print(f"[✓] Model initialized")
-
-            # Create analysis prompt
-            prompt = f"""Analyze this WOMEN'S fashion concept image and generate 6-8 actionable edit suggestions that the user can apply to refine this design.
+# Gemini prompt for style suggestions; filled in with str.format_map per request
+_SUGGESTION_PROMPT = """Analyze this WOMEN'S fashion concept image and generate 6-8 actionable edit suggestions that the user can apply to refine this design.
 
 CRITICAL: This is WOMEN'S FASHION ONLY. All suggestions must be appropriate for women's clothing and styles.
 
@@ -105,72 +62,188 @@ Return ONLY this JSON format:
 
 Return only the JSON, no additional text."""
 
+
+@lru_cache(maxsize=64)
+def _load_image_cached(filepath: str, mtime: float) -> Image:
+    """Load an image for Gemini vision; mtime is part of the key so edited files are reloaded."""
+    # Copy straight out of the page cache into the one bytes object the request needs
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return Image(image_bytes=bytes(mm))
+
+
+class SuggestionService:
+    """Service for generating AI-powered style variation suggestions using Gemini with vision."""
+
+    # Gemini model shared by all instances; created on first use (or by warmup)
+    _model: Optional[GenerativeModel] = None
+
+    def __init__(self):
+        self.gcp_client = get_gcp_client()
+
+    def _get_model(self) -> GenerativeModel:
+        """Get the shared Gemini model, creating it on first use."""
+        model = type(self)._model
+        if model is None:
+            model = type(self)._model = self.gcp_client.get_gemini_model()  # Gemini 2.5 Flash supports vision
+        return model
+
+    async def warmup(self):
+        """
+        Create the Gemini model and send a 1-token request, so the connection
+        is already open when the first real suggestion request arrives.
+        """
+        try:
+            model = self._get_model()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None,
+                lambda: model.generate_content(
+                    "Reply with OK.",
+                    generation_config=GenerationConfig(max_output_tokens=1)
+                )
+            )
+            logger.info("Suggestion model warmed up")
+        except Exception as e:
+            logger.warning("Suggestion model warmup failed: %s", e)
+
+    async def generate_style_suggestions(
+        self,
+        image_url: str,
+        description: str,
+        original_query: str
+    ) -> List[str]:
+        """
+        Analyze a fashion concept image and generate 4-6 style variation suggestions.
+
+        Args:
+            image_url: URL/path to the concept image
+            description: Text description of the current concept
+            original_query: User's original search query
+
+        Returns:
+            List of 4-6 short, actionable refinement suggestions
+        """
+
+        logger.debug(
+            "Generating style suggestions: image_url=%s description=%.100s original_query=%s",
+            image_url, description, original_query
+        )
+
+        try:
+            logger.debug("[1] Loading concept image...")
+
+            # Load the image from local path
+            if image_url.startswith("/images/"):
+                filename = image_url.replace("/images/", "")
+                filepath = os.path.join("generated_images", filename)
+
+                try:
+                    mtime = os.stat(filepath).st_mtime
+                except FileNotFoundError:
+                    logger.warning("Image file not found at %s, using fallback suggestions", filepath)
+                    return self._fallback_suggestions()
+
+                logger.debug("Image found: %s", filepath)
+
+                # Load image for Gemini vision (cached across refinement requests)
+                image = _load_image_cached(filepath, mtime)
+            else:
+                logger.warning("Unsupported image URL format: %s, using fallback suggestions", image_url)
+                return self._fallback_suggestions()
+
+            logger.debug("[2] Initializing Gemini model with vision...")
+            model = self._get_model()
+
+            # Create analysis prompt
+            prompt = _SUGGESTION_PROMPT.format_map({
+                "description": description,
+                "original_query": original_query
+            })
+
             generation_config = GenerationConfig(
                 temperature=0.7,  # Higher for creative suggestions
                 max_output_tokens=4096,  # Increased significantly for longer detailed suggestions
             )
 
-            print("\n[3] Sending request to Gemini...")
-            response = model.generate_content(
+            logger.debug("[3] Streaming response from Gemini...")
+            responses = model.generate_content(
                 [image, prompt],
-                generation_config=generation_config
+                generation_config=generation_config,
+                stream=True
             )
 
-            print(f"[✓] Response received from Gemini")
-
-            # Extract and parse JSON response
-            response_text = response.text.strip()
-            print(f"[4] Parsing response...")
-            print(f"Response text length: {len(response_text)} characters")
-            print(f"Response text preview: {response_text[:200]}...")
-
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-
-            response_text = response_text.strip()
-
-            # Check if response was truncated
-            if not response_text.endswith("}"):
-                print(f"[!] Warning: Response appears truncated (doesn't end with '}}'), attempting to repair...")
-                print(f"Last 100 chars: ...{response_text[-100:]}")
-
-                # Try to repair truncated JSON
-                response_text = self._repair_truncated_json(response_text)
-                print(f"[!] Repaired JSON, new length: {len(response_text)}")
-
-            try:
-                parsed_data = json.loads(response_text)
-                suggestions = parsed_data.get("suggestions", [])
-            except json.JSONDecodeError as json_err:
-                print(f"[✗] JSON parsing failed: {json_err}")
-                print(f"[!] Using fallback suggestions")
-                return self._fallback_suggestions()
+            # Parse as chunks arrive; stop as soon as the suggestions list is complete
+            chunks = []
+            suggestions = None
+            list_closed = False
+            for chunk in responses:
+                try:
+                    chunk_text = chunk.text
+                except ValueError:
+                    # Chunk without text (e.g. only a finish reason)
+                    continue
+                chunks.append(chunk_text)
+                list_closed = list_closed or "]" in chunk_text
+                if list_closed:
+                    suggestions = self._parse_suggestions("".join(chunks))
+                    if suggestions is not None:
+                        break
+
+            response_text = "".join(chunks).strip()
+            logger.debug(
+                "[4] Response received (%d characters): %.200s...",
+                len(response_text), response_text
+            )
 
-            print(f"[✓] Parsed {len(suggestions)} suggestions")
-            for i, suggestion in enumerate(suggestions, 1):
-                print(f"    {i}. {suggestion}")
+            if suggestions is None:
+                # Remove markdown code blocks if present
+                response_text = _FENCE_RE.sub("", response_text).strip()
 
-            print("="*80)
-            print("SUGGESTION GENERATION COMPLETED")
-            print("="*80 + "\n")
+                # Check if response was truncated
+                if not response_text.endswith("}"):
+                    logger.warning(
+                        "Response appears truncated (doesn't end with '}'), attempting to repair. Last 100 chars: ...%s",
+                        response_text[-100:]
+                    )
 
-            return suggestions[:8]  # Return max 8 suggestions
+                    # Try to repair truncated JSON
+                    response_text = self._repair_truncated_json(response_text)
+                    logger.debug("Repaired JSON, new length: %d", len(response_text))
 
-        except Exception as e:
-            print(f"\n[✗] ERROR generating suggestions:")
-            print(f"    Error type: {type(e).__name__}")
-            print(f"    Error message: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            print("="*80 + "\n")
+                suggestions = self._parse_suggestions(response_text)
+                if suggestions is None:
+                    logger.warning("JSON parsing failed, using fallback suggestions")
+                    return self._fallback_suggestions()
+
+            logger.debug("Parsed %d suggestions: %s", len(suggestions), suggestions)
+
+            return suggestions
+
+        except Exception:
+            logger.exception("Error generating suggestions")
 
             return self._fallback_suggestions()
 
+    def _parse_suggestions(self, text: str) -> Optional[List[str]]:
+        """
+        Parse a (possibly fenced) JSON response into at most 8 suggestion strings.
+
+        Returns:
+            List of suggestions, or None if the text is not a complete JSON object
+            with a suggestions list
+        """
+        text = text.strip()
+        # Fast path: a bare JSON object needs no fence stripping
+        if not (text[:1] == "{" and text[-1:] == "}"):
+            text = _FENCE_RE.sub("", text)
+
+        try:
+            parsed_data = orjson.loads(text)
+            # Only the suggestions list is used; keep at most 8, as plain strings
+            return [str(s) for s in parsed_data["suggestions"][:8]]
+        except (orjson.JSONDecodeError, KeyError, AttributeError, TypeError):
+            return None
+
     def _repair_truncated_json(self, text: str) -> str:
         """Attempt to repair truncated JSON by closing open structures."""
         # Count open braces and brackets
@@ -193,14 +266,10 @@ Return only the JSON, no additional text."""
 
     def _extract_partial_suggestions(self, text: str) -> List[dict]:
         """Extract any complete suggestions from partially malformed JSON."""
-        import re
         suggestions = []
 
         # Try to find complete suggestion objects using regex
-        pattern = r'\{\s*"title"\s*:\s*"([^"]+)"\s*,\s*"description"\s*:\s*"([^"]+)"\s*\}'
-        matches = re.findall(pattern, text, re.DOTALL)
-
-        for title, description in matches:
+        for title, description in _SUGG_RE.findall(text):
             suggestions.append({
                 "title": title.strip(),
                 "description": description.strip()
@@ -12,15 +12,29 @@ Pipeline:
 4. Generate summary report
 """
 
-import json
+import asyncio
+import atexit
+import functools
+import io
+import logging
+import logging.handlers
+import operator
 import os
+import queue
 import sys
 import time
 import uuid
 import argparse
-from typing import List, Dict, Any
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.api_core.exceptions import ResourceExhausted
 from google.cloud import bigquery
+from google.cloud.bigquery.format_options import ParquetOptions
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,6 +42,139 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import get_settings
 from synthetic_catalog.image_generator import ImageGenerator
 
+logger = logging.getLogger("catalog")
+
+# Products processed at once, and the initial spacing between image requests (avoid hitting quotas)
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MIN_INTERVAL = 2.0
+
+# Bounds for the adaptive spacing, and retries of an image request that hit the quota
+MIN_INTERVAL_FLOOR = 0.25
+MIN_INTERVAL_CEILING = 60.0
+MAX_QUOTA_RETRIES = 5
+
+# Buffered BigQuery rows are written in one load job every FLUSH_EVERY products
+FLUSH_EVERY = 500
+
+# Threads reserved for BigQuery load jobs, separate from the image/embedding API threads
+BQ_WORKERS = 4
+
+# Arrow layout of a synthetic_products row (see create_table.sql); rows are buffered column-wise.
+# NOT NULL columns are non-nullable here too, so the Parquet load keeps their REQUIRED mode
+ARROW_SCHEMA = pa.schema([
+    pa.field("product_id", pa.string(), nullable=False),
+    pa.field("image_filename", pa.string(), nullable=False),
+    pa.field("gcs_uri", pa.string(), nullable=False),
+    pa.field("embedding", pa.list_(pa.float32())),
+    pa.field("product_name", pa.string(), nullable=False),
+    pa.field("brand_name", pa.string(), nullable=False),
+    pa.field("category", pa.string(), nullable=False),
+    pa.field("subcategory", pa.string()),
+    pa.field("base_color", pa.string(), nullable=False),
+    pa.field("secondary_color", pa.string()),
+    pa.field("pattern", pa.string()),
+    pa.field("fabric", pa.string()),
+    pa.field("fit", pa.string()),
+    pa.field("sleeve_length", pa.string()),
+    pa.field("neck_style", pa.string()),
+    pa.field("season", pa.string(), nullable=False),
+    pa.field("occasion", pa.string()),
+    pa.field("style", pa.string()),
+    pa.field("gender", pa.string(), nullable=False),
+    pa.field("price_original", pa.float64(), nullable=False),
+    pa.field("price_discounted", pa.float64()),
+    pa.field("description", pa.string()),
+    pa.field("created_at", pa.timestamp("us", tz="UTC"), nullable=False),
+])
+SCHEMA_COLUMNS = tuple(ARROW_SCHEMA.names)
+
+# Columns copied straight from the product spec (product_name .. description), and the
+# NOT NULL ones a spec must provide
+_SPEC_COLUMNS = SCHEMA_COLUMNS[SCHEMA_COLUMNS.index("product_name"):SCHEMA_COLUMNS.index("created_at")]
+_REQUIRED_SPEC_COLUMNS = (
+    "product_name", "brand_name", "category", "base_color", "season", "gender", "price_original"
+)
+_check_required = operator.itemgetter(*_REQUIRED_SPEC_COLUMNS)
+
+
+def _as_str(value: Any) -> str:
+    """Accept only real strings for STRING columns (Arrow would reject anything else at load time)."""
+    if not isinstance(value, str):
+        raise TypeError(f"expected a string, got {type(value).__name__}")
+    return value
+
+
+# (column, converter) for each spec column: prices are coerced to float, strings type-checked
+_SPEC_CONVERTERS = tuple(
+    (name, float if ARROW_SCHEMA.field(name).type == pa.float64() else _as_str)
+    for name in _SPEC_COLUMNS
+)
+
+# Generation log lines: one JSON object per line, naive UTC timestamps marked as UTC
+_LOG_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NAIVE_UTC
+
+# Buffered log bytes are written once they reach this size (and after every BigQuery load)
+LOG_FLUSH_BYTES = 1 << 20
+
+
+def _embedding_column(embeddings: List[np.ndarray]) -> pa.ListArray:
+    """Build the list<float32> embedding column from float32 vectors without per-element copies."""
+    offsets = np.zeros(len(embeddings) + 1, dtype=np.int32)
+    np.cumsum([len(e) for e in embeddings], out=offsets[1:])
+    return pa.ListArray.from_arrays(offsets, np.concatenate(embeddings))
+
+
+class RateLimiter:
+    """
+    Space out API requests so the pipeline stays under provider quotas.
+
+    The spacing adapts: it doubles when the provider reports quota
+    exhaustion and shrinks slowly after each successful request, so the
+    pipeline settles just under the real quota instead of a fixed guess.
+    Requests already in flight when the spacing doubles hit the same quota
+    burst, so their errors do not double it again.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        floor: float = MIN_INTERVAL_FLOOR,
+        ceiling: float = MIN_INTERVAL_CEILING
+    ):
+        self.min_interval = min_interval
+        self.floor = floor
+        self.ceiling = ceiling
+        self._next_slot = 0.0
+        self._penalized_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> float:
+        """
+        Wait until the next start slot is available.
+
+        Returns:
+            Start time of the request, to pass to penalize if it hits the quota
+        """
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return time.monotonic()
+
+    def penalize(self, started_at: float):
+        """Back off after a quota error: double the spacing and pause new requests."""
+        if started_at < self._penalized_at:
+            return  # started before the last back-off, so it is part of the same burst
+        self._penalized_at = time.monotonic()
+        self.min_interval = min(self.ceiling, self.min_interval * 2)
+        self._next_slot = max(self._next_slot, time.monotonic() + self.min_interval)
+
+    def reward(self):
+        """Speed up slightly after a successful request."""
+        self.min_interval = max(self.floor, self.min_interval * 0.95)
+
 
 class CatalogCreator:
     """Orchestrate synthetic catalog creation."""
@@ -37,95 +184,241 @@ class CatalogCreator:
         gcs_bucket: str = "assortment_automation",
         gcs_prefix: str = "synthetic_catalog/images",
         bq_dataset: str = "products",
-        bq_table: str = "synthetic_products"
+        bq_table: str = "synthetic_products",
+        save_local_images: bool = False
     ):
         self.settings = get_settings()
-        self.image_generator = ImageGenerator(gcs_bucket, gcs_prefix)
+        self.image_generator = ImageGenerator(gcs_bucket, gcs_prefix, save_local=save_local_images)
 
         # BigQuery setup
         self.bq_client = bigquery.Client(project=self.settings.gcp_project_id)
         self.bq_dataset = bq_dataset
         self.bq_table = bq_table
         self.table_ref = f"{self.settings.gcp_project_id}.{bq_dataset}.{bq_table}"
+        self._cols = self._empty_columns()
+        # Success log entries for the buffered rows; written only once their load job succeeds
+        self._pending_log: List[Dict[str, Any]] = []
+
+        # Blocking client calls run in dedicated pools so the stages never queue behind each other
+        # or exhaust the event loop's default executor; the API pool is sized per run
+        self._bq_pool = ThreadPoolExecutor(max_workers=BQ_WORKERS, thread_name_prefix="bq")
+        self._api_pool: Optional[ThreadPoolExecutor] = None
 
         # Logging
         self.log_file = os.path.join(os.path.dirname(__file__), "output/generation_log.jsonl")
         os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        # Entries are batched in memory and appended with one write. A product's success entry is
+        # only added once its BigQuery load succeeds, so the log never lists a product as done
+        # that --skip-logged would then skip without it being in the table
+        self._log_fd = os.open(self.log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._log_buf = bytearray()
+        atexit.register(os.close, self._log_fd)
+        atexit.register(self._flush_log)  # atexit runs in reverse, so this flushes before the close
 
         self.success_count = 0
         self.failure_count = 0
         self.start_time = None
 
-    def create_catalog(self, product_specs: List[Dict[str, Any]], resume_from: int = 0):
+    async def create_catalog(
+        self,
+        product_specs: List[Dict[str, Any]],
+        resume_from: int = 0,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        skip_logged: bool = False
+    ):
         """
         Create complete synthetic catalog.
 
+        Products flow through a three-stage pipeline connected by queues:
+        image generation -> embedding -> BigQuery buffering. The image and
+        embedding stages each run `concurrency` workers, so one product's
+        embedding overlaps the next products' image generation. The blocking
+        API calls run in a dedicated thread pool, BigQuery loads in another.
+
         Args:
             product_specs: List of product specifications
             resume_from: Index to resume from (for retries)
+            concurrency: Number of workers per image/embedding stage
+            skip_logged: Skip products the generation log already records as loaded
         """
         self.start_time = datetime.now()
         total = len(product_specs)
 
-        print(f"\n{'='*80}")
-        print(f"SYNTHETIC CATALOG CREATION")
-        print(f"{'='*80}")
-        print(f"Total products: {total}")
-        print(f"BigQuery table: {self.table_ref}")
-        print(f"Starting from index: {resume_from}")
-        print(f"Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"{'='*80}\n")
+        logger.info("=" * 80)
+        logger.info("SYNTHETIC CATALOG CREATION")
+        logger.info("=" * 80)
+        logger.info("Total products: %d", total)
+        logger.info("BigQuery table: %s", self.table_ref)
+        logger.info("Starting from index: %d", resume_from)
+        logger.info("Concurrency: %d", concurrency)
+        logger.info("Started at: %s", self.start_time.strftime('%Y-%m-%d %H:%M:%S'))
+        logger.info("=" * 80)
+
+        rate_limiter = RateLimiter(DEFAULT_MIN_INTERVAL)
+        # One thread per image and embedding worker
+        self._api_pool = ThreadPoolExecutor(max_workers=concurrency * 2, thread_name_prefix="catalog-api")
+        image_q: asyncio.Queue = asyncio.Queue()
+        embedding_q: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        bq_q: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+        # Products finish out of order, so a retry skips exactly the indices already loaded
+        done = self._logged_successes() if skip_logged else set()
+        if done:
+            logger.info("Skipping %d products already loaded according to the log", len(done))
 
         for i, spec in enumerate(product_specs[resume_from:], start=resume_from):
-            try:
-                print(f"\n[{i+1}/{total}] Processing: {spec['product_name']}")
-                print(f"  Category: {spec['category']} | Color: {spec['base_color']} | Price: ${spec['price_original']}")
-
-                # Generate unique product ID
-                product_id = f"SYN-{uuid.uuid4().hex[:8].upper()}"
-                print(f"  Product ID: {product_id}")
-
-                # Step 1: Generate image
-                image_result = self.image_generator.generate_product_image(spec, product_id)
-                if not image_result:
-                    raise Exception("Image generation failed")
-
-                # Step 2: Generate embedding
-                print(f"  [Embedding] Generating multimodal embedding...")
-                embedding = self.image_generator.generate_embedding(image_result['gcs_uri'])
-                print(f"  ✓ Embedding generated ({len(embedding)} dimensions)")
-
-                # Step 3: Insert into BigQuery
-                print(f"  [BigQuery] Inserting into {self.bq_table}...")
-                self._insert_into_bigquery(
-                    product_id=product_id,
-                    image_filename=image_result['image_filename'],
-                    gcs_uri=image_result['gcs_uri'],
-                    embedding=embedding,
-                    spec=spec
-                )
-                print(f"  ✓ Inserted into BigQuery")
-
-                # Log success
-                self._log_success(i, product_id, spec, image_result)
-                self.success_count += 1
-
-                print(f"  ✅ SUCCESS ({self.success_count}/{i+1})")
-
-                # Rate limiting (avoid hitting quotas)
-                time.sleep(2)
-
-            except Exception as e:
-                print(f"  ❌ FAILED: {e}")
-                self._log_failure(i, spec, str(e))
-                self.failure_count += 1
-
-                # Continue to next product
-                continue
+            if i not in done:
+                image_q.put_nowait((i, spec))
+
+        async def image_worker():
+            while not image_q.empty():
+                i, spec = image_q.get_nowait()
+                result = await self._generate_image(i, spec, total, rate_limiter)
+                if result is not None:
+                    await embedding_q.put(result)
+
+        async def embedding_worker():
+            while (item := await embedding_q.get()) is not None:
+                result = await self._generate_embedding(*item, total)
+                if result is not None:
+                    await bq_q.put(result)
+
+        async def bq_worker():
+            while (item := await bq_q.get()) is not None:
+                await self._queue_row(*item, total)
+
+        try:
+            embedding_tasks = [asyncio.create_task(embedding_worker()) for _ in range(concurrency)]
+            bq_task = asyncio.create_task(bq_worker())
+
+            # Drain stages in order; None tells a downstream worker to stop
+            await asyncio.gather(*[image_worker() for _ in range(concurrency)])
+            for _ in embedding_tasks:
+                await embedding_q.put(None)
+            await asyncio.gather(*embedding_tasks)
+            await bq_q.put(None)
+            await bq_task
+        finally:
+            # Write whatever is still buffered, even if the run was interrupted
+            await self._flush()
+            self._flush_log()
+            self._api_pool.shutdown(wait=False)
 
         # Generate summary report
         self._generate_report(total)
 
+    async def _generate_image(
+        self,
+        i: int,
+        spec: Dict[str, Any],
+        total: int,
+        rate_limiter: RateLimiter
+    ) -> Optional[Tuple]:
+        """Pipeline stage 1: generate and upload the product image, backing off on quota errors."""
+        prefix = f"[{i+1}/{total}]"
+        try:
+            logger.info("%s Processing: %s", prefix, spec['product_name'])
+            logger.info(
+                "  %s Category: %s | Color: %s | Price: $%s",
+                prefix, spec['category'], spec['base_color'], spec['price_original']
+            )
+
+            # Generate unique product ID
+            product_id = f"SYN-{uuid.uuid4().hex[:8].upper()}"
+            logger.info("  %s Product ID: %s", prefix, product_id)
+
+            for attempt in range(MAX_QUOTA_RETRIES + 1):
+                started_at = await rate_limiter.wait()
+                try:
+                    image_result = await self._run_in(
+                        self._api_pool, self.image_generator.generate_product_image, spec, product_id
+                    )
+                    rate_limiter.reward()
+                    break
+                except ResourceExhausted as e:
+                    if attempt == MAX_QUOTA_RETRIES:
+                        raise
+                    rate_limiter.penalize(started_at)
+                    logger.warning(
+                        "  %s Quota exceeded (%s), retrying with %.1fs spacing",
+                        prefix, e, rate_limiter.min_interval
+                    )
+
+            if not image_result:
+                raise Exception("Image generation failed")
+
+            return i, spec, product_id, image_result
+
+        except Exception as e:
+            self._record_failure(i, spec, total, e)
+            return None
+
+    async def _generate_embedding(
+        self,
+        i: int,
+        spec: Dict[str, Any],
+        product_id: str,
+        image_result: Dict[str, Any],
+        total: int
+    ) -> Optional[Tuple]:
+        """Pipeline stage 2: embed the uploaded image."""
+        prefix = f"[{i+1}/{total}]"
+        try:
+            logger.info("  %s [Embedding] Generating multimodal embedding...", prefix)
+            embedding = await self._run_in(
+                self._api_pool, self.image_generator.generate_embedding, image_result['gcs_uri']
+            )
+            logger.info("  %s ✓ Embedding generated (%d dimensions)", prefix, len(embedding))
+
+            return i, spec, product_id, image_result, embedding
+
+        except Exception as e:
+            self._record_failure(i, spec, total, e)
+            return None
+
+    async def _queue_row(
+        self,
+        i: int,
+        spec: Dict[str, Any],
+        product_id: str,
+        image_result: Dict[str, Any],
+        embedding: List[float],
+        total: int
+    ):
+        """Pipeline stage 3: buffer the BigQuery row, flushing when the batch is full."""
+        prefix = f"[{i+1}/{total}]"
+        try:
+            self._insert_into_bigquery(
+                product_id=product_id,
+                image_filename=image_result['image_filename'],
+                gcs_uri=image_result['gcs_uri'],
+                embedding=embedding,
+                spec=spec
+            )
+            # Success is logged and counted once the row's load job succeeds
+            self._pending_log.append(self._success_entry(i, product_id, spec, image_result))
+
+            logger.info("  %s ✅ Queued for BigQuery (%d pending)", prefix, self._pending_count())
+
+        except Exception as e:
+            self._record_failure(i, spec, total, e)
+            return
+
+        if self._pending_count() >= FLUSH_EVERY:
+            await self._flush()
+
+    @staticmethod
+    async def _run_in(pool: ThreadPoolExecutor, func, *args):
+        """Run a blocking call in the given thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(func, *args))
+
+    def _record_failure(self, i: int, spec: Dict[str, Any], total: int, error: Exception):
+        """Log and count a product that failed at any pipeline stage."""
+        logger.error("  [%d/%d] ❌ FAILED: %s", i + 1, total, error)
+        self._log_failure(i, spec, str(error))
+        self.failure_count += 1
+
     def _insert_into_bigquery(
         self,
         product_id: str,
@@ -134,44 +427,126 @@ class CatalogCreator:
         embedding: List[float],
         spec: Dict[str, Any]
     ):
-        """Insert product into BigQuery table."""
-
-        row = {
-            "product_id": product_id,
-            "image_filename": image_filename,
-            "gcs_uri": gcs_uri,
-            "embedding": embedding,
-            "product_name": spec["product_name"],
-            "brand_name": spec["brand_name"],
-            "category": spec["category"],
-            "subcategory": spec.get("subcategory"),
-            "base_color": spec["base_color"],
-            "secondary_color": spec.get("secondary_color"),
-            "pattern": spec.get("pattern"),
-            "fabric": spec.get("fabric"),
-            "fit": spec.get("fit"),
-            "sleeve_length": spec.get("sleeve_length"),
-            "neck_style": spec.get("neck_style"),
-            "season": spec["season"],
-            "occasion": spec.get("occasion"),
-            "style": spec.get("style"),
-            "gender": spec["gender"],
-            "price_original": spec["price_original"],
-            "price_discounted": spec.get("price_discounted"),
-            "description": spec.get("description"),
-            "created_at": datetime.utcnow().isoformat()
-        }
-
-        # Insert
-        errors = self.bq_client.insert_rows_json(self.table_ref, [row])
+        """Buffer a product row for the next BigQuery load job."""
+
+        # Raises KeyError if a NOT NULL column is missing from the spec; a null value is
+        # rejected here too, since one null in a non-nullable column would fail the whole load
+        if None in _check_required(spec):
+            raise ValueError("Product spec has a null value in a NOT NULL column")
+
+        # Coerce and type-check each value now, so a malformed spec fails on its own instead of
+        # failing the Arrow conversion for every row in its batch
+        values = []
+        for name, convert in _SPEC_CONVERTERS:
+            value = spec.get(name)
+            if value is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Product spec has an invalid {name}: {value!r}") from None
+            values.append(value)
+
+        # Values in SCHEMA_COLUMNS order
+        row = (
+            product_id,
+            image_filename,
+            gcs_uri,
+            np.asarray(embedding, dtype=np.float32),  # compact float32 vector until the load
+            *values,
+            datetime.now(timezone.utc),
+        )
+
+        for column, value in zip(self._cols.values(), row):
+            column.append(value)
+
+    @staticmethod
+    def _empty_columns() -> Dict[str, List[Any]]:
+        """Fresh column buffers, one list per BigQuery column."""
+        return {name: [] for name in SCHEMA_COLUMNS}
+
+    def _pending_count(self) -> int:
+        """Number of rows buffered for the next load job."""
+        return len(self._cols["product_id"])
+
+    async def _flush(self):
+        """
+        Load all buffered rows into BigQuery, then log and count their products.
 
-        if errors:
-            raise Exception(f"BigQuery insert errors: {errors}")
+        The buffers are swapped and the counts updated on the event loop; only the
+        load job itself runs in the BigQuery pool.
+        """
+        if not self._pending_count():
+            return
+
+        # Take ownership of the buffers so products finishing meanwhile start new ones
+        cols, self._cols = self._cols, self._empty_columns()
+        entries, self._pending_log = self._pending_log, []
+
+        error = await self._run_in(self._bq_pool, self._load_rows, cols)
+        if error is None:
+            for entry in entries:
+                self._write_log(entry)
+            self.success_count += len(entries)
+            logger.info("✓ %d products succeeded so far", self.success_count)
+        else:
+            for entry in entries:
+                self._log_failure(entry["index"], entry, f"BigQuery load failed: {error}")
+            self.failure_count += len(entries)
+        self._flush_log()
+
+    def _load_rows(self, cols: Dict[str, List[Any]]) -> Optional[Exception]:
+        """
+        Write buffered rows to BigQuery in a single Parquet load job.
 
-    def _log_success(self, index: int, product_id: str, spec: Dict[str, Any], image_result: Dict[str, Any]):
-        """Log successful product creation."""
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+        Returns:
+            None if the load succeeded, otherwise the error
+        """
+        product_ids = cols["product_id"]
+
+        logger.info("[BigQuery] Loading %d rows into %s...", len(product_ids), self.bq_table)
+        parquet_options = ParquetOptions()
+        parquet_options.enable_list_inference = True  # load list columns as ARRAY
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            parquet_options=parquet_options
+        )
+        try:
+            buffer = io.BytesIO()
+            cols["embedding"] = _embedding_column(cols["embedding"])
+            pq.write_table(pa.table(cols, schema=ARROW_SCHEMA), buffer)
+            buffer.seek(0)
+            self.bq_client.load_table_from_file(buffer, self.table_ref, job_config=job_config).result()
+            logger.info("✓ Loaded %d rows into BigQuery", len(product_ids))
+            return None
+        except Exception as e:
+            logger.error("❌ BigQuery load failed for %d rows: %s", len(product_ids), e)
+            logger.error("   Product IDs: %s", ", ".join(product_ids))
+            return e
+
+    def _logged_successes(self) -> Set[int]:
+        """Indices of the products the generation log records as successfully loaded."""
+        done = set()
+        with open(self.log_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # e.g. a line cut short when a run was killed
+                if entry.get("status") == "success":
+                    done.add(entry["index"])
+        return done
+
+    def _success_entry(
+        self,
+        index: int,
+        product_id: str,
+        spec: Dict[str, Any],
+        image_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build the log entry for a successfully created product."""
+        return {
+            "timestamp": datetime.utcnow(),
             "index": index,
             "status": "success",
             "product_id": product_id,
@@ -180,13 +555,10 @@ class CatalogCreator:
             "gcs_uri": image_result["gcs_uri"]
         }
 
-        with open(self.log_file, 'a') as f:
-            f.write(json.dumps(log_entry) + '\n')
-
     def _log_failure(self, index: int, spec: Dict[str, Any], error: str):
         """Log failed product creation."""
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcnow(),
             "index": index,
             "status": "failure",
             "product_name": spec.get("product_name", "Unknown"),
@@ -194,11 +566,28 @@ class CatalogCreator:
             "error": error
         }
 
-        with open(self.log_file, 'a') as f:
-            f.write(json.dumps(log_entry) + '\n')
+        self._write_log(log_entry)
+
+    def _write_log(self, log_entry: Dict[str, Any]):
+        """Append a log entry to the in-memory buffer, writing it out once it is large enough."""
+        self._log_buf += orjson.dumps(log_entry, option=_LOG_OPTIONS)
+        if len(self._log_buf) >= LOG_FLUSH_BYTES:
+            self._flush_log()
+
+    def _flush_log(self):
+        """Append all buffered log entries to the log file."""
+        with memoryview(self._log_buf) as view:
+            written = 0
+            while written < len(view):
+                with view[written:] as pending:
+                    written += os.write(self._log_fd, pending)
+        del self._log_buf[:]
 
     def _generate_report(self, total: int):
         """Generate summary report."""
+        self._flush_log()
+        os.fsync(self._log_fd)
+
         end_time = datetime.now()
         duration = end_time - self.start_time
 
@@ -232,17 +621,36 @@ Next Steps:
 {'='*80}
 """
 
-        print(report)
+        logger.info(report)
 
         # Save report
         report_path = os.path.join(os.path.dirname(__file__), "output/summary_report.txt")
         with open(report_path, 'w') as f:
             f.write(report)
 
-        print(f"✓ Report saved to: {report_path}\n")
+        logger.info("✓ Report saved to: %s", report_path)
+
+
+def _setup_logging() -> logging.handlers.QueueListener:
+    """
+    Send catalog logs to stdout from a background thread.
+
+    Records are handed to a QueueHandler, so the concurrent product tasks never
+    block on formatting or console I/O.
+    """
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    return listener
 
 
 def main():
+    listener = _setup_logging()
+    atexit.register(listener.stop)
+
     parser = argparse.ArgumentParser(description="Create synthetic product catalog")
     parser.add_argument("--specs", type=str, required=True, help="Path to product specifications JSON")
     parser.add_argument("--gcs-bucket", type=str, default="assortment_automation", help="GCS bucket name")
@@ -250,24 +658,36 @@ def main():
     parser.add_argument("--bq-dataset", type=str, default="products", help="BigQuery dataset")
     parser.add_argument("--bq-table", type=str, default="synthetic_products", help="BigQuery table")
     parser.add_argument("--resume-from", type=int, default=0, help="Resume from index (for retries)")
+    parser.add_argument(
+        "--skip-logged", action="store_true",
+        help="Skip products already logged as successful in generation_log.jsonl (for retries)"
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Products processed concurrently")
+    parser.add_argument("--save-local", action="store_true", help="Also keep a local copy of each image")
 
     args = parser.parse_args()
 
     # Load product specifications
-    with open(args.specs, 'r') as f:
-        product_specs = json.load(f)
+    with open(args.specs, 'rb') as f:
+        product_specs = orjson.loads(f.read())
 
-    print(f"✓ Loaded {len(product_specs)} product specifications from: {args.specs}")
+    logger.info("✓ Loaded %d product specifications from: %s", len(product_specs), args.specs)
 
     # Create catalog
     creator = CatalogCreator(
         gcs_bucket=args.gcs_bucket,
         gcs_prefix=args.gcs_prefix,
         bq_dataset=args.bq_dataset,
-        bq_table=args.bq_table
+        bq_table=args.bq_table,
+        save_local_images=args.save_local
     )
 
-    creator.create_catalog(product_specs, resume_from=args.resume_from)
+    asyncio.run(creator.create_catalog(
+        product_specs,
+        resume_from=args.resume_from,
+        concurrency=args.concurrency,
+        skip_logged=args.skip_logged
+    ))
 
 
 if __name__ == "__main__":
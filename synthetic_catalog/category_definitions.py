@@ -3,6 +3,8 @@ Category definitions and attribute templates for synthetic product generation.
 H&M-inspired women's fashion catalog.
 """
 
+import sys
+
 # Category distribution (Batch 2: Focused on Shoes, Accessories, Loungewear - 100 products)
 CATEGORY_DISTRIBUTION = {
     "Shoes": 50,
@@ -171,10 +173,38 @@ DESCRIPTION_TEMPLATES = {
 }
 
 
-def get_category_attributes(category: str) -> dict:
-    """Get relevant attributes for a category."""
+# Intern the canonical attribute values, so equal strings parsed from Gemini responses
+# can be swapped for these shared objects instead of each spec keeping its own copy
+SUBCATEGORIES = {category: [sys.intern(v) for v in values] for category, values in SUBCATEGORIES.items()}
+COLORS = {group: [sys.intern(v) for v in values] for group, values in COLORS.items()}
+ALL_COLORS = [color for category in COLORS.values() for color in category]
+FABRICS = [sys.intern(v) for v in FABRICS]
+PATTERNS = [sys.intern(v) for v in PATTERNS]
+FITS = [sys.intern(v) for v in FITS]
+SLEEVE_LENGTHS = [sys.intern(v) for v in SLEEVE_LENGTHS]
+NECK_STYLES = [sys.intern(v) for v in NECK_STYLES]
+SEASONS = [sys.intern(v) for v in SEASONS]
+OCCASIONS = [sys.intern(v) for v in OCCASIONS]
+STYLES = [sys.intern(v) for v in STYLES]
+BRAND_NAMES = [sys.intern(v) for v in BRAND_NAMES]
+
+
+def _build_category_attributes(category: str) -> dict:
+    """Assemble the attribute dict for a category, with defaults for unknown categories."""
     return {
         "subcategories": SUBCATEGORIES.get(category, []),
         "price_range": PRICE_RANGES.get(category, (29.99, 59.99)),
         "description_template": DESCRIPTION_TEMPLATES.get(category, "")
     }
+
+
+# Attributes for every known category, built once at import
+CATEGORY_ATTRS = {category: _build_category_attributes(category) for category in SUBCATEGORIES}
+
+
+def get_category_attributes(category: str) -> dict:
+    """Get relevant attributes for a category (shared dict; do not mutate)."""
+    attrs = CATEGORY_ATTRS.get(category)
+    if attrs is None:
+        attrs = _build_category_attributes(category)
+    return attrs
@@ -3,12 +3,52 @@ Image Generator using Imagen 4 (Vertex AI).
 Generates high-quality e-commerce product photography.
 """
 
+import hashlib
 import os
 import sys
 from typing import Dict, Any, List, Optional
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
+from google.api_core.exceptions import NotFound, ResourceExhausted
 from google.cloud import storage
+from google.cloud.storage.retry import DEFAULT_RETRY
+from requests.adapters import HTTPAdapter
 import vertexai
 from vertexai.preview.vision_models import ImageGenerationModel
+from vertexai.vision_models import MultiModalEmbeddingModel, Image
+
+# Images up to this size go up in a single multipart request (the client library's
+# multipart limit); larger ones use a resumable upload with large chunks
+SINGLE_SHOT_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024  # must be a multiple of 256 KiB
+
+# Keep-alive connections to GCS; sized above the catalog's concurrent image/embedding calls
+HTTP_POOL_SIZE = 32
+
+# Imagen prompt for product photography; filled in with str.format_map per product
+_IMAGEN_PROMPT = """Professional e-commerce product photography of a {product_name}.
+
+Product Details:
+- Type: {category} - {subcategory}
+- Color: {color_desc}
+- Fabric: {fabric}
+- Pattern: {pattern}
+- Fit: {fit}
+- Style: {style}
+
+Photography Specifications:
+- Female model wearing the garment
+- Front-facing view, full body or 3/4 length depending on garment
+- Clean minimalist background (white or soft grey)
+- Professional studio lighting with soft, even illumination
+- Sharp focus on garment details and texture
+- Modern catalog/e-commerce quality
+- Scandinavian minimalist aesthetic
+- Contemporary fast-fashion photography style (H&M, Zara aesthetic)
+- Natural, relaxed model pose
+- Realistic, wearable, commercially viable design
+
+The garment should look modern, stylish, and ready to purchase. Emphasize fabric texture, drape, and fit. Professional fashion catalog quality."""
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,10 +59,16 @@ from config import get_settings
 class ImageGenerator:
     """Generate product images using Imagen 4."""
 
-    def __init__(self, gcs_bucket: str = "assortment_automation", gcs_prefix: str = "synthetic_catalog/images"):
+    def __init__(
+        self,
+        gcs_bucket: str = "assortment_automation",
+        gcs_prefix: str = "synthetic_catalog/images",
+        save_local: bool = False
+    ):
         self.settings = get_settings()
         self.gcs_bucket = gcs_bucket
         self.gcs_prefix = gcs_prefix
+        self.save_local = save_local  # keep a copy under output/images; GCS is the source of truth
 
         # Initialize Vertex AI
         vertexai.init(
@@ -30,10 +76,44 @@ class ImageGenerator:
             location=self.settings.gcp_location
         )
 
-        # Initialize GCS client
-        self.storage_client = storage.Client(project=self.settings.gcp_project_id)
+        # Initialize GCS client on one pooled session, so concurrent uploads and cache
+        # lookups reuse open TLS connections instead of handshaking per request
+        self.storage_client = storage.Client(
+            project=self.settings.gcp_project_id,
+            _http=self._build_http_session()
+        )
         self.bucket = self.storage_client.bucket(self.gcs_bucket)
 
+        # Imagen outputs keyed by prompt hash, so regenerating a catalog reuses earlier images
+        self._cache_prefix = f"{gcs_prefix}/_cache"
+
+        # Vertex AI model handles, loaded on first use and reused for every product
+        self._imagen_model: Optional[ImageGenerationModel] = None
+        self._embedding_model: Optional[MultiModalEmbeddingModel] = None
+
+    @staticmethod
+    def _build_http_session() -> AuthorizedSession:
+        """Authorized requests session with a connection pool large enough for the catalog's concurrent workers."""
+        credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/devstorage.read_write"])
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def imagen_model(self) -> ImageGenerationModel:
+        """Imagen model handle, created on first use."""
+        if self._imagen_model is None:
+            self._imagen_model = ImageGenerationModel.from_pretrained("imagen-3.0-generate-001")
+        return self._imagen_model
+
+    @property
+    def embedding_model(self) -> MultiModalEmbeddingModel:
+        """Multimodal embedding model handle, created on first use."""
+        if self._embedding_model is None:
+            self._embedding_model = MultiModalEmbeddingModel.from_pretrained("multimodalembedding@001")
+        return self._embedding_model
+
     def generate_product_image(
         self,
         product_spec: Dict[str, Any],
@@ -47,7 +127,10 @@ class ImageGenerator:
             product_id: Unique product ID
 
         Returns:
-            Dictionary with gcs_uri, local_path, and image_filename
+            Dictionary with gcs_uri, local_path (None unless save_local), and image_filename
+
+        Raises:
+            ResourceExhausted: If the Imagen quota is exceeded (callers back off and retry)
         """
         try:
             # Build Imagen 4 prompt
@@ -68,15 +151,17 @@ class ImageGenerator:
             # Create filename
             image_filename = f"{product_id}.jpg"
 
-            # Save locally (temp)
-            local_dir = os.path.join(os.path.dirname(__file__), "output/images")
-            os.makedirs(local_dir, exist_ok=True)
-            local_path = os.path.join(local_dir, image_filename)
+            # Save locally (optional)
+            local_path = None
+            if self.save_local:
+                local_dir = os.path.join(os.path.dirname(__file__), "output/images")
+                os.makedirs(local_dir, exist_ok=True)
+                local_path = os.path.join(local_dir, image_filename)
 
-            with open(local_path, 'wb') as f:
-                f.write(image_bytes)
+                with open(local_path, 'wb') as f:
+                    f.write(image_bytes)
 
-            print(f"  ✓ Saved locally: {local_path}")
+                print(f"  ✓ Saved locally: {local_path}")
 
             # Upload to GCS
             gcs_uri = self._upload_to_gcs(image_bytes, image_filename)
@@ -89,6 +174,9 @@ class ImageGenerator:
                 "image_filename": image_filename
             }
 
+        except ResourceExhausted:
+            raise
+
         except Exception as e:
             print(f"  ✗ Error generating image: {e}")
             import traceback
@@ -105,64 +193,47 @@ class ImageGenerator:
         Returns:
             Imagen 4 prompt string
         """
-        product_name = spec['product_name']
-        category = spec['category']
-        subcategory = spec.get('subcategory', category)
-        base_color = spec['base_color']
+        base_color = spec['base_color'].lower()
         secondary_color = spec.get('secondary_color')
-        fabric = spec.get('fabric', 'fabric')
-        pattern = spec.get('pattern', 'solid')
-        fit = spec.get('fit', 'regular fit')
-        style = spec.get('style', 'modern')
 
         # Build color description
-        color_desc = base_color.lower()
+        color_desc = base_color
         if secondary_color:
-            color_desc = f"{base_color.lower()} with {secondary_color.lower()} accents"
-
-        # Build detailed prompt
-        prompt = f"""Professional e-commerce product photography of a {product_name.lower()}.
-
-Product Details:
-- Type: {category} - {subcategory}
-- Color: {color_desc}
-- Fabric: {fabric.lower()}
-- Pattern: {pattern.lower()}
-- Fit: {fit.lower()}
-- Style: {style.lower()}
-
-Photography Specifications:
-- Female model wearing the garment
-- Front-facing view, full body or 3/4 length depending on garment
-- Clean minimalist background (white or soft grey)
-- Professional studio lighting with soft, even illumination
-- Sharp focus on garment details and texture
-- Modern catalog/e-commerce quality
-- Scandinavian minimalist aesthetic
-- Contemporary fast-fashion photography style (H&M, Zara aesthetic)
-- Natural, relaxed model pose
-- Realistic, wearable, commercially viable design
-
-The garment should look modern, stylish, and ready to purchase. Emphasize fabric texture, drape, and fit. Professional fashion catalog quality."""
-
-        return prompt
+            color_desc = f"{base_color} with {secondary_color.lower()} accents"
+
+        return _IMAGEN_PROMPT.format_map({
+            "product_name": spec['product_name'].lower(),
+            "category": spec['category'],
+            "subcategory": spec.get('subcategory', spec['category']),
+            "color_desc": color_desc,
+            "fabric": spec.get('fabric', 'fabric').lower(),
+            "pattern": spec.get('pattern', 'solid').lower(),
+            "fit": spec.get('fit', 'regular fit').lower(),
+            "style": spec.get('style', 'modern').lower()
+        })
 
     def _generate_with_imagen4(self, prompt: str) -> Optional[bytes]:
         """
         Generate image using Imagen 4 via Vertex AI.
 
+        Identical prompts are served from the GCS prompt cache instead of
+        calling Imagen again.
+
         Args:
             prompt: Image generation prompt
 
         Returns:
             Image bytes or None if failed
         """
-        try:
-            # Initialize Imagen 4 model
-            model = ImageGenerationModel.from_pretrained("imagen-3.0-generate-001")
+        cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        cached = self._load_cached_image(cache_key)
+        if cached is not None:
+            print(f"    ✓ Reusing cached image for prompt {cache_key}")
+            return cached
 
+        try:
             # Generate images
-            response = model.generate_images(
+            response = self.imagen_model.generate_images(
                 prompt=prompt,
                 number_of_images=1,
                 language="en",
@@ -175,14 +246,39 @@ The garment should look modern, stylish, and ready to purchase. Emphasize fabric
                 # Get first image
                 image = response.images[0]
                 # Convert to bytes
-                return image._image_bytes
+                image_bytes = image._image_bytes
+                self._store_cached_image(cache_key, image_bytes)
+                return image_bytes
 
             return None
 
+        except ResourceExhausted:
+            raise
+
         except Exception as e:
             print(f"    Error calling Imagen 4: {e}")
             return None
 
+    def _load_cached_image(self, cache_key: str) -> Optional[bytes]:
+        """Fetch a previously generated image for this prompt hash, or None on a miss."""
+        blob = self.bucket.blob(f"{self._cache_prefix}/{cache_key}.jpg")
+        try:
+            # One GET instead of exists() + download
+            return blob.download_as_bytes()
+        except NotFound:
+            return None
+        except Exception as e:
+            print(f"    ⚠ Image cache lookup failed: {e}")
+            return None
+
+    def _store_cached_image(self, cache_key: str, image_bytes: bytes):
+        """Save a generated image under its prompt hash; failures only cost a future cache hit."""
+        blob = self.bucket.blob(f"{self._cache_prefix}/{cache_key}.jpg")
+        try:
+            blob.upload_from_string(image_bytes, content_type='image/jpeg', retry=DEFAULT_RETRY, timeout=60)
+        except Exception as e:
+            print(f"    ⚠ Image cache write failed: {e}")
+
     def _upload_to_gcs(self, image_bytes: bytes, filename: str) -> str:
         """
         Upload image to Google Cloud Storage.
@@ -195,10 +291,18 @@ The garment should look modern, stylish, and ready to purchase. Emphasize fabric
             GCS URI (gs://bucket/path)
         """
         blob_path = f"{self.gcs_prefix}/{filename}"
-        blob = self.bucket.blob(blob_path)
+
+        # chunk_size=None keeps typical Imagen JPEGs on the single-request path
+        chunk_size = UPLOAD_CHUNK_SIZE if len(image_bytes) > SINGLE_SHOT_MAX_BYTES else None
+        blob = self.bucket.blob(blob_path, chunk_size=chunk_size)
 
         # Upload with content type
-        blob.upload_from_string(image_bytes, content_type='image/jpeg')
+        blob.upload_from_string(
+            image_bytes,
+            content_type='image/jpeg',
+            retry=DEFAULT_RETRY,
+            timeout=60
+        )
 
         # Return GCS URI
         return f"gs://{self.gcs_bucket}/{blob_path}"
@@ -214,14 +318,11 @@ The garment should look modern, stylish, and ready to purchase. Emphasize fabric
             1408-dimensional embedding vector
         """
         try:
-            from vertexai.vision_models import MultiModalEmbeddingModel, Image
-
             # Load image from GCS
             image = Image.load_from_file(gcs_uri)
 
             # Generate embedding
-            model = MultiModalEmbeddingModel.from_pretrained("multimodalembedding@001")
-            embeddings = model.get_embeddings(
+            embeddings = self.embedding_model.get_embeddings(
                 image=image,
                 dimension=1408
             )
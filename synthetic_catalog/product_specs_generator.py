@@ -3,12 +3,16 @@ Product Specifications Generator using Gemini.
 Generates diverse, realistic fashion product specifications.
 """
 
-import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import sys
 import os
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import argparse
+import numpy as np
+import orjson
 
 # Add parent directory to path to import from main project
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -32,6 +36,85 @@ from synthetic_catalog.category_definitions import (
     get_category_attributes
 )
 
+# Share of fallback products that get a discounted price, and the discount applied
+DISCOUNT_PROBABILITY = 0.3
+DISCOUNT_FACTOR = 0.75
+
+# The JSON array in a Gemini response: a ```/```json fenced block wins over a bare array,
+# so brackets in any text before the fence are not mistaken for the start of the payload
+_FENCED_JSON = re.compile(r"```(?:json)?\s*(\[.*\])\s*```", re.DOTALL | re.IGNORECASE)
+_BARE_JSON = re.compile(r"(\[.*\])", re.DOTALL)
+
+# Categories generated concurrently; kept low to stay within Gemini requests-per-minute quotas
+GEMINI_CONCURRENCY = 3
+
+_REQUIRED_FIELDS = (
+    "product_name", "brand_name", "category", "base_color",
+    "season", "gender", "price_original"
+)
+
+
+def _intern(value: Any) -> Any:
+    """Return the shared interned copy of a categorical string value."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _sample_prices(
+    rng: np.random.Generator,
+    count: int,
+    price_min: float,
+    price_max: float
+) -> Tuple[List[float], List[Optional[float]]]:
+    """
+    Draw original and discounted prices for `count` products in a few array operations.
+
+    Returns:
+        (original prices, discounted prices with None for undiscounted products)
+    """
+    prices = np.round(rng.uniform(price_min, price_max, count), 2)
+    discounted = np.round(prices * DISCOUNT_FACTOR, 2)
+    discount_mask = rng.random(count) < DISCOUNT_PROBABILITY
+    return prices.tolist(), [
+        price if has_discount else None
+        for price, has_discount in zip(discounted.tolist(), discount_mask.tolist())
+    ]
+
+
+@dataclass
+class ProductSpec:
+    """
+    A validated product specification.
+
+    Fields are in output order; orjson serializes instances directly, so specs
+    stay in this compact form until they are written to disk.
+    """
+    # Explicit slots (dataclass(slots=True) needs Python 3.10); fields have no class-level defaults
+    __slots__ = (
+        "product_name", "brand_name", "category", "subcategory", "base_color",
+        "secondary_color", "pattern", "fabric", "fit", "sleeve_length", "neck_style",
+        "season", "occasion", "style", "gender", "price_original", "price_discounted",
+        "description"
+    )
+
+    product_name: str
+    brand_name: str
+    category: str
+    subcategory: str
+    base_color: str
+    secondary_color: Optional[str]
+    pattern: str
+    fabric: str
+    fit: str
+    sleeve_length: Optional[str]
+    neck_style: Optional[str]
+    season: str
+    occasion: str
+    style: str
+    gender: str
+    price_original: float
+    price_discounted: Optional[float]
+    description: str
+
 
 class ProductSpecsGenerator:
     """Generate product specifications using Gemini."""
@@ -39,7 +122,7 @@ class ProductSpecsGenerator:
     def __init__(self):
         self.gcp_client = get_gcp_client()
 
-    def generate_specifications(self, total_count: int = 200) -> List[Dict[str, Any]]:
+    def generate_specifications(self, total_count: int = 200) -> List[ProductSpec]:
         """
         Generate product specifications for all categories.
 
@@ -47,19 +130,13 @@ class ProductSpecsGenerator:
             total_count: Total number of products to generate (default: 200)
 
         Returns:
-            List of product specification dictionaries
+            List of product specifications
         """
         print(f"\n{'='*80}")
         print(f"GENERATING {total_count} PRODUCT SPECIFICATIONS")
         print(f"{'='*80}\n")
 
-        all_specs = []
-
-        for category, count in CATEGORY_DISTRIBUTION.items():
-            print(f"[{category}] Generating {count} products...")
-            specs = self._generate_category_specs(category, count)
-            all_specs.extend(specs)
-            print(f"  ✓ Generated {len(specs)} {category} products\n")
+        all_specs = list(self.iter_specifications(total_count))
 
         print(f"{'='*80}")
         print(f"TOTAL: Generated {len(all_specs)} product specifications")
@@ -67,7 +144,37 @@ class ProductSpecsGenerator:
 
         return all_specs
 
-    def _generate_category_specs(self, category: str, count: int) -> List[Dict[str, Any]]:
+    def iter_specifications(self, total_count: int = 200) -> Iterator[ProductSpec]:
+        """
+        Yield product specifications category by category, as each category is ready.
+
+        Up to GEMINI_CONCURRENCY category requests run at once in worker threads.
+        Specs come out in CATEGORY_DISTRIBUTION order, so a consumer can start on
+        the first category while later ones are still being generated.
+
+        Args:
+            total_count: Total number of products to generate (default: 200)
+
+        Yields:
+            Product specifications
+        """
+        with ThreadPoolExecutor(max_workers=GEMINI_CONCURRENCY, thread_name_prefix="specs") as executor:
+            futures = []
+            for category, count in CATEGORY_DISTRIBUTION.items():
+                print(f"[{category}] Generating {count} products...")
+                futures.append((category, executor.submit(self._generate_category_specs, category, count)))
+
+            try:
+                for category, future in futures:
+                    specs = future.result()
+                    print(f"  ✓ Generated {len(specs)} {category} products\n")
+                    yield from specs
+            finally:
+                # Consumer stopped early: don't start categories nobody will read
+                for _, future in futures:
+                    future.cancel()
+
+    def _generate_category_specs(self, category: str, count: int) -> List[ProductSpec]:
         """
         Generate specifications for a specific category using Gemini.
 
@@ -94,18 +201,12 @@ class ProductSpecsGenerator:
             model = self.gcp_client.get_gemini_model()
             response = model.generate_content(prompt)
 
-            # Parse JSON response
-            response_text = response.text.strip()
-
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
+            # Parse JSON response, ignoring any markdown fence or text around the array
+            response_text = response.text
+            m = _FENCED_JSON.search(response_text) or _BARE_JSON.search(response_text)
+            payload = m.group(1) if m else response_text
 
-            specs = json.loads(response_text.strip())
+            specs = orjson.loads(payload)
 
             # Validate and clean specs
             validated_specs = [self._validate_spec(spec, category) for spec in specs]
@@ -182,41 +283,50 @@ Example format:
   }}
 ]"""
 
-    def _validate_spec(self, spec: Dict[str, Any], category: str) -> Dict[str, Any]:
-        """Validate and ensure spec has all required fields."""
-        required_fields = [
-            "product_name", "brand_name", "category", "base_color",
-            "season", "gender", "price_original"
-        ]
-
+    def _validate_spec(self, spec: Dict[str, Any], category: str) -> Optional[ProductSpec]:
+        """Validate a Gemini spec and fill in defaults for optional fields."""
         # Check required fields
-        for field in required_fields:
-            if field not in spec or not spec[field]:
+        for field in _REQUIRED_FIELDS:
+            if not spec.get(field):
                 print(f"  ⚠ Missing required field '{field}', skipping product")
                 return None
 
-        # Ensure category matches
-        spec["category"] = category
+        product_name = spec["product_name"]
 
-        # Ensure gender is "Women"
-        spec["gender"] = "Women"
-
-        # Fill in optional fields with defaults
-        spec.setdefault("subcategory", category)
-        spec.setdefault("secondary_color", None)
-        spec.setdefault("pattern", "Solid")
-        spec.setdefault("fabric", "Cotton")
-        spec.setdefault("fit", "Regular Fit")
-        spec.setdefault("sleeve_length", None)
-        spec.setdefault("neck_style", None)
-        spec.setdefault("occasion", "Casual")
-        spec.setdefault("style", "Modern")
-        spec.setdefault("price_discounted", None)
-        spec.setdefault("description", f"A beautiful {spec['product_name'].lower()}.")
-
-        return spec
+        # Prices must be numeric, or the row fails at BigQuery load time
+        try:
+            price_original = float(spec["price_original"])
+            price_discounted = spec.get("price_discounted")
+            if price_discounted is not None:
+                price_discounted = float(price_discounted)
+        except (TypeError, ValueError):
+            print(f"  ⚠ Invalid price for '{product_name}', skipping product")
+            return None
+
+        # Categorical values repeat across products; interning makes every spec share the
+        # category_definitions string objects instead of the copies the JSON parser made
+        return ProductSpec(
+            product_name=product_name,
+            brand_name=_intern(spec["brand_name"]),
+            category=category,  # Ensure category matches
+            subcategory=_intern(spec.get("subcategory", category)),
+            base_color=_intern(spec["base_color"]),
+            secondary_color=_intern(spec.get("secondary_color")),
+            pattern=_intern(spec.get("pattern", "Solid")),
+            fabric=_intern(spec.get("fabric", "Cotton")),
+            fit=_intern(spec.get("fit", "Regular Fit")),
+            sleeve_length=_intern(spec.get("sleeve_length")),
+            neck_style=_intern(spec.get("neck_style")),
+            season=_intern(spec["season"]),
+            occasion=_intern(spec.get("occasion", "Casual")),
+            style=_intern(spec.get("style", "Modern")),
+            gender="Women",  # Ensure gender is "Women"
+            price_original=price_original,
+            price_discounted=price_discounted,
+            description=spec.get("description", f"A beautiful {product_name.lower()}.")
+        )
 
-    def _generate_fallback_specs(self, category: str, count: int) -> List[Dict[str, Any]]:
+    def _generate_fallback_specs(self, category: str, count: int) -> List[ProductSpec]:
         """Generate specs using templates if Gemini fails."""
         specs = []
         category_attrs = get_category_attributes(category)
@@ -224,22 +334,45 @@ Example format:
         price_min, price_max = category_attrs["price_range"]
         template = category_attrs["description_template"]
 
+        # Sample every attribute for the whole category up front; random.choices returns the
+        # pool's own str objects, where a NumPy string array would copy each value back out
+        subcategory_col = random.choices(subcategories, k=count)
+        color_col = random.choices(ALL_COLORS, k=count)
+        fabric_col = random.choices(FABRICS, k=count)
+        pattern_col = random.choices(PATTERNS, k=count)
+        fit_col = random.choices(FITS, k=count)
+        season_col = random.choices(SEASONS, k=count)
+        occasion_col = random.choices(OCCASIONS, k=count)
+        style_col = random.choices(STYLES, k=count)
+        brand_col = random.choices(BRAND_NAMES, k=count)
+
+        if category in ["Tops", "Dresses", "Knitwear", "Outerwear"]:
+            sleeve_col = random.choices(SLEEVE_LENGTHS, k=count)
+        else:
+            sleeve_col = [None] * count
+        if category in ["Tops", "Dresses", "Knitwear"]:
+            neck_col = random.choices(NECK_STYLES, k=count)
+        else:
+            neck_col = [None] * count
+
+        rng = np.random.default_rng()
+        price_col, discounted_col = _sample_prices(rng, count, price_min, price_max)
+
         for i in range(count):
-            subcategory = random.choice(subcategories)
-            base_color = random.choice(ALL_COLORS)
-            fabric = random.choice(FABRICS)
-            pattern = random.choice(PATTERNS)
-            fit = random.choice(FITS)
-            season = random.choice(SEASONS)
-            occasion = random.choice(OCCASIONS)
-            style_choice = random.choice(STYLES)
-            brand = random.choice(BRAND_NAMES)
-
-            sleeve = random.choice(SLEEVE_LENGTHS) if category in ["Tops", "Dresses", "Knitwear", "Outerwear"] else None
-            neck = random.choice(NECK_STYLES) if category in ["Tops", "Dresses", "Knitwear"] else None
-
-            price = round(random.uniform(price_min, price_max), 2)
-            discounted = round(price * 0.75, 2) if random.random() < 0.3 else None
+            subcategory = subcategory_col[i]
+            base_color = color_col[i]
+            fabric = fabric_col[i]
+            pattern = pattern_col[i]
+            fit = fit_col[i]
+            season = season_col[i]
+            occasion = occasion_col[i]
+            style_choice = style_col[i]
+            brand = brand_col[i]
+            sleeve = sleeve_col[i]
+            neck = neck_col[i]
+
+            price = price_col[i]
+            discounted = discounted_col[i]
 
             # Build product name
             product_name = f"{fit.split()[0]} {fabric} {subcategory}"
@@ -260,26 +393,26 @@ Example format:
                 season=season
             )
 
-            spec = {
-                "product_name": product_name,
-                "brand_name": brand,
-                "category": category,
-                "subcategory": subcategory,
-                "base_color": base_color,
-                "secondary_color": None,
-                "pattern": pattern,
-                "fabric": fabric,
-                "fit": fit,
-                "sleeve_length": sleeve,
-                "neck_style": neck,
-                "season": season,
-                "occasion": occasion,
-                "style": style_choice,
-                "gender": "Women",
-                "price_original": price,
-                "price_discounted": discounted,
-                "description": description
-            }
+            spec = ProductSpec(
+                product_name=product_name,
+                brand_name=brand,
+                category=category,
+                subcategory=subcategory,
+                base_color=base_color,
+                secondary_color=None,
+                pattern=pattern,
+                fabric=fabric,
+                fit=fit,
+                sleeve_length=sleeve,
+                neck_style=neck,
+                season=season,
+                occasion=occasion,
+                style=style_choice,
+                gender="Women",
+                price_original=price,
+                price_discounted=discounted,
+                description=description
+            )
 
             specs.append(spec)
 
@@ -301,8 +434,8 @@ def main():
     output_path = os.path.join(os.path.dirname(__file__), args.output)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, 'w') as f:
-        json.dump(specs, f, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(specs, option=orjson.OPT_INDENT_2))
 
     print(f"✓ Saved {len(specs)} product specifications to: {output_path}")
 
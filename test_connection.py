@@ -5,6 +5,7 @@ Run this after setup to ensure everything is configured correctly.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from services.gcp_client import get_gcp_client
 from config import get_settings
 
@@ -53,88 +54,98 @@ def test_gcp_client():
 
 
 def test_bigquery(client):
-    """Test BigQuery connection and table access."""
-    print("\n" + "=" * 60)
-    print("Testing BigQuery Connection...")
-    print("=" * 60)
+    """
+    Test BigQuery connection and table access.
+
+    Returns:
+        Tuple of (passed, output lines); output is returned rather than printed
+        so the probe can run alongside test_vertex_ai
+    """
+    lines = []
+    say = lines.append
+
+    say("\n" + "=" * 60)
+    say("Testing BigQuery Connection...")
+    say("=" * 60)
 
     try:
         settings = get_settings()
         bq_client = client.bigquery
 
-        # Test table existence and count
-        query = f"""
-        SELECT COUNT(*) as count
-        FROM `{settings.gcp_project_id}.{settings.bigquery_dataset}.{settings.bigquery_table}`
-        """
-
-        print(f"Querying: {settings.bigquery_dataset}.{settings.bigquery_table}")
-        query_job = bq_client.query(query)
-        result = query_job.result()
-
-        for row in result:
-            count = row.count
-            print(f"✓ BigQuery connection successful")
-            print(f"  - Products found: {count:,}")
-
-            if count == 0:
-                print("\n⚠ Warning: No products in table")
-                print("  Please load your product data with embeddings")
-
-        # Test if embeddings column exists
+        # Test table existence and count from table metadata (one get_table
+        # round-trip; a COUNT(*) query would be a billed job)
+        say(f"Querying: {settings.bigquery_dataset}.{settings.bigquery_table}")
         table_ref = bq_client.get_table(
             f"{settings.gcp_project_id}.{settings.bigquery_dataset}.{settings.bigquery_table}"
         )
 
-        has_embedding = any(field.name == "embedding" for field in table_ref.schema)
+        count = table_ref.num_rows  # excludes rows still in the streaming buffer
+        say(f"✓ BigQuery connection successful")
+        say(f"  - Products found: {count:,}")
+
+        if count == 0:
+            say("\n⚠ Warning: No products in table")
+            say("  Please load your product data with embeddings")
+
+        # Test if embeddings column exists
+        schema_names = {field.name for field in table_ref.schema}
+        has_embedding = "embedding" in schema_names
         if has_embedding:
-            print("✓ Embedding column exists")
+            say("✓ Embedding column exists")
         else:
-            print("✗ Embedding column not found")
-            print("  Please add embedding column to your table")
+            say("✗ Embedding column not found")
+            say("  Please add embedding column to your table")
 
-        return True
+        return True, lines
 
     except Exception as e:
-        print(f"✗ BigQuery error: {e}")
-        print("\nPlease ensure:")
-        print("  1. BigQuery API is enabled")
-        print("  2. Service account has bigquery.dataViewer role")
-        print("  3. Service account has bigquery.jobUser role")
-        print("  4. Dataset and table names are correct in .env")
-        return False
+        say(f"✗ BigQuery error: {e}")
+        say("\nPlease ensure:")
+        say("  1. BigQuery API is enabled")
+        say("  2. Service account has bigquery.dataViewer role")
+        say("  3. Service account has bigquery.jobUser role")
+        say("  4. Dataset and table names are correct in .env")
+        return False, lines
 
 
 def test_vertex_ai(client):
-    """Test Vertex AI / Gemini access."""
-    print("\n" + "=" * 60)
-    print("Testing Vertex AI / Gemini...")
-    print("=" * 60)
+    """
+    Test Vertex AI / Gemini access.
+
+    Returns:
+        Tuple of (passed, output lines)
+    """
+    lines = []
+    say = lines.append
+
+    say("\n" + "=" * 60)
+    say("Testing Vertex AI / Gemini...")
+    say("=" * 60)
 
     try:
         # Test Gemini model
         model = client.get_gemini_model()
-        print("✓ Gemini model loaded")
+        say("✓ Gemini model loaded")
 
         # Test with a simple prompt
-        print("  Testing with simple prompt...")
+        say("  Testing with simple prompt...")
         response = model.generate_content("Say 'Hello from Gemini!'")
-        print(f"  Response: {response.text[:50]}...")
-        print("✓ Gemini API is working")
+        say(f"  Response: {response.text[:50]}...")
+        say("✓ Gemini API is working")
 
         # Test Gemini Image model
         image_model = client.get_gemini_image_model()
-        print("✓ Gemini Image model loaded")
+        say("✓ Gemini Image model loaded")
 
-        return True
+        return True, lines
 
     except Exception as e:
-        print(f"✗ Vertex AI error: {e}")
-        print("\nPlease ensure:")
-        print("  1. Vertex AI API is enabled")
-        print("  2. Service account has aiplatform.user role")
-        print("  3. Gemini models are available in your region")
-        return False
+        say(f"✗ Vertex AI error: {e}")
+        say("\nPlease ensure:")
+        say("  1. Vertex AI API is enabled")
+        say("  2. Service account has aiplatform.user role")
+        say("  3. Gemini models are available in your region")
+        return False, lines
 
 
 def main():
@@ -160,11 +171,17 @@ def main():
         print("=" * 60)
         sys.exit(1)
 
-    # Test BigQuery
-    results.append(test_bigquery(client))
-
-    # Test Vertex AI
-    results.append(test_vertex_ai(client))
+    # Test BigQuery and Vertex AI concurrently (independent network round-trips);
+    # each probe returns its output, printed in order once both finish
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        f_bq = executor.submit(test_bigquery, client)
+        f_vx = executor.submit(test_vertex_ai, client)
+        outcomes = [f_bq.result(), f_vx.result()]
+
+    for passed, lines in outcomes:
+        for line in lines:
+            print(line)
+        results.append(passed)
 
     # Summary
     print("\n" + "=" * 60)